@@ -1,2 +1,11 @@
 # -*- coding: utf-8 -*-
 from .rpm import RPM  # noqa
+
+
+def __getattr__(name):
+    # the scanner pulls in sqlite3, multiprocessing, argparse and csv,
+    # only import it when scan is asked for
+    if name == 'scan':
+        from .scanner import scan
+        return scan
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
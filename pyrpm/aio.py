@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+asyncio helpers
+
+RPM.from_stream parses the headers of a single asyncio.StreamReader,
+parse_many parses many sources on one event loop.
+
+    >>> async def fetch(host):
+    ...     reader, writer = await asyncio.open_connection(host, 4000)
+    ...     return reader
+    >>> rpms = await parse_many([functools.partial(fetch, host)
+    ...                          for host in hosts], limit=100)
+
+'''
+
+import asyncio
+import inspect
+
+from pyrpm.rpm import RPM, RPMError
+
+
+async def parse_many(sources, limit=64, strict=False, stats=None):
+    ''' parses the headers of many sources concurrently
+
+        sources - asyncio.StreamReader objects, or callables returning
+        one (or an awaitable of one), called under the limit so
+        connections are only opened when they are parsed
+        limit - maximum number of sources parsed at once
+        stats - a pyrpm.stats.ParseStats counting every parse
+
+        returns the RPM objects in the order of sources, a source that
+        failed gives its exception instead
+    '''
+    semaphore = asyncio.Semaphore(limit)
+
+    async def parse(source):
+        async with semaphore:
+            try:
+                reader = source() if callable(source) else source
+                if inspect.isawaitable(reader):
+                    reader = await reader
+                return await RPM.from_stream(reader, strict=strict,
+                                             stats=stats)
+            except (RPMError, Exception) as error:
+                return error
+
+    return await asyncio.gather(*[parse(source) for source in sources])
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+header parsing benchmark
+
+parses synthetic packages (see pyrpm.writer) of several shapes from
+memory and reports, for every shape, the throughput (packages/s and MB/s
+of headers), the time spent in each stage and the peak memory held by
+the parsed packages.
+
+    python -m pyrpm.benchmark --output before.json
+    python -m pyrpm.benchmark --compare before.json
+
+stages:
+    parse - RPM(...), the lead, the headers and their index
+    decode - decoding the value of every tag
+    files - building and walking the file list
+
+packages are generated from fixed seeds and every stage keeps its best
+time over the repeats, runs on the same machine are comparable.
+
+'''
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+from pyrpm.rpm import RPM
+from pyrpm.writer import synthetic_package
+
+SHAPES = {
+    'minimal': dict(files=0, string_size=16, dependencies=0),
+    'typical': dict(files=100, string_size=64, dependencies=20,
+                    changelogs=10),
+    'many-files': dict(files=10000, string_size=64, dependencies=50),
+    'long-strings': dict(files=10, string_size=4096, dependencies=10,
+                         changelogs=100),
+    'large-payload': dict(files=100, string_size=64, dependencies=20,
+                          payload_size=4 * 1024 * 1024),
+}
+
+STAGES = ('parse', 'decode', 'files')
+
+
+def decode_all(rpm):
+    for tag in rpm:
+        rpm[tag]
+
+
+def walk_files(rpm):
+    for path in rpm.files():
+        pass
+
+
+def run_stages(packages):
+    ''' parses packages (bytes), returns the stage -> seconds timings
+    and the parsed RPMs
+    '''
+    timings = dict()
+    start = time.perf_counter()
+    rpms = [RPM(BytesIO(data)) for data in packages]
+    timings['parse'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for rpm in rpms:
+        decode_all(rpm)
+    timings['decode'] = time.perf_counter() - start
+    start = time.perf_counter()
+    for rpm in rpms:
+        walk_files(rpm)
+    timings['files'] = time.perf_counter() - start
+    return timings, rpms
+
+
+def peak_memory(packages):
+    ''' peak memory allocated while parsing and decoding packages,
+    and the memory still held by the parsed packages
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        rpms = [RPM(BytesIO(data)) for data in packages]
+        for rpm in rpms:
+            decode_all(rpm)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, retained
+
+
+def benchmark_shape(shape, count=100, repeat=5):
+    ''' benchmarks count packages of shape (synthetic_package arguments)
+    '''
+    packages = [synthetic_package('package%d' % (seed, ), seed=seed,
+                                  **shape) for seed in range(count)]
+    best = dict((stage, float('inf')) for stage in STAGES)
+    for _ in range(repeat):
+        timings, rpms = run_stages(packages)
+        for stage, seconds in timings.items():
+            best[stage] = min(best[stage], seconds)
+    header_bytes = sum(rpm.payload_offset for rpm in rpms)
+    del rpms
+    peak, retained = peak_memory(packages)
+    seconds = best['parse'] + best['decode']
+    return {
+        'shape': shape,
+        'packages': count,
+        'package_bytes': sum(len(data) for data in packages),
+        'header_bytes': header_bytes,
+        'stages': best,
+        'packages_per_second': count / seconds,
+        'megabytes_per_second': header_bytes / seconds / 1e6,
+        'peak_memory': peak,
+        'retained_memory_per_package': retained // count,
+    }
+
+
+def run(shapes=None, count=100, repeat=5):
+    ''' benchmarks the named shapes (all by default), returns the
+    results as a json serializable dict
+    '''
+    results = {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'time': int(time.time()),
+        'count': count,
+        'repeat': repeat,
+        'shapes': dict(),
+    }
+    for name in shapes or sorted(SHAPES):
+        results['shapes'][name] = benchmark_shape(SHAPES[name], count,
+                                                  repeat)
+    return results
+
+
+def report(results, baseline=None, output=sys.stdout):
+    ''' writes a results table, with the ratio to the baseline results
+    throughput when given (> 1 is faster)
+    '''
+    output.write('%-14s %10s %9s %9s %9s %9s %12s %8s\n'
+                 % ('shape', 'pkg/s', 'MB/s', 'parse', 'decode', 'files',
+                    'peak KB', 'vs base'))
+    for name, result in sorted(results['shapes'].items()):
+        stages = result['stages']
+        ratio = ''
+        if baseline is not None and name in baseline['shapes']:
+            ratio = '%.2fx' % (result['packages_per_second'] /
+                               baseline['shapes'][name]['packages_per_second'])
+        output.write('%-14s %10.0f %9.1f %8.1fms %8.1fms %8.1fms %12d %8s\n'
+                     % (name, result['packages_per_second'],
+                        result['megabytes_per_second'],
+                        stages['parse'] * 1e3, stages['decode'] * 1e3,
+                        stages['files'] * 1e3, result['peak_memory'] // 1024,
+                        ratio))
+
+
+def main(argv=None):
+    ''' python -m pyrpm.benchmark entry point
+    '''
+    parser = argparse.ArgumentParser(
+        prog='python -m pyrpm.benchmark',
+        description='benchmark RPM header parsing on synthetic packages')
+    parser.add_argument('-s', '--shape', action='append',
+                        choices=sorted(SHAPES),
+                        help='shape to run, repeatable (default: all)')
+    parser.add_argument('-n', '--count', type=int, default=100,
+                        help='packages per shape (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='runs per shape, the best is kept '
+                             '(default: %(default)s)')
+    parser.add_argument('-o', '--output', metavar='JSON',
+                        help='save the results')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='results of a previous run to compare with')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as results:
+            baseline = json.load(results)
+    results = run(args.shape, args.count, args.repeat)
+    report(results, baseline)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
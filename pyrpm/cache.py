@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+metadata cache
+
+keeps the decoded header tags of RPM files in a SQLite database, keyed
+on the file identity (path, size, mtime and inode), so unchanged files
+do not need to be parsed again.
+
+    >>> cache = MetadataCache('/var/cache/pyrpm.sqlite', max_entries=100000)
+    >>> cache.get('package-1.0-r1.i586.rpm')[rpmdefs.RPMTAG_NAME]
+    'package'
+
+'''
+
+import hashlib
+import json
+import os
+import sqlite3
+from array import array
+
+from pyrpm import rpmdefs
+from pyrpm.rpm import RPM
+
+# bump when the way values are stored changes
+CACHE_FORMAT = 2
+
+# changes (stores and LRU clock updates) committed at once
+FLUSH_INTERVAL = 1000
+
+
+def tags_version(tags):
+    ''' version of the cache contents for a tag set, entries stored
+    for another tag set are not valid
+    '''
+    digest = hashlib.sha1(repr(sorted(set(tags))).encode('ascii'))
+    return '%d:%s' % (CACHE_FORMAT, digest.hexdigest(), )
+
+
+def file_identity(path):
+    ''' (size, mtime_ns, inode) of the file at path
+    '''
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino, )
+
+
+def encode_values(values):
+    ''' the tag -> value dict as JSON, arrays keep their typecode and
+    bytes are hex encoded so decode_values gives the same values back
+    '''
+    encoded = dict()
+    for tag, value in values.items():
+        if isinstance(value, array):
+            value = ['array', value.typecode, value.tolist()]
+        elif isinstance(value, bytes):
+            value = ['bytes', value.hex()]
+        else:
+            value = ['value', value]
+        encoded[tag] = value
+    return json.dumps(encoded, separators=(',', ':'))
+
+
+def decode_values(data):
+    ''' the tag -> value dict from encode_values data, only strings,
+    numbers, lists, arrays and bytes are ever built from it
+    '''
+    values = dict()
+    for tag, value in json.loads(data).items():
+        kind = value[0]
+        if kind == 'array':
+            value = array(value[1], value[2])
+        elif kind == 'bytes':
+            value = bytes.fromhex(value[1])
+        elif kind == 'value':
+            value = value[1]
+        else:
+            raise ValueError('unknown cached value kind %r' % (kind, ))
+        values[int(tag)] = value
+    return values
+
+
+def read_tags(path, tags=rpmdefs.RPMTAGS):
+    ''' parses the package at path, returns a tag -> value dict for
+    the tags of tags present in the package
+    '''
+    with RPM.open(path) as rpm:
+        return dict((tag, rpm[tag]) for tag in tags if tag in rpm)
+
+
+class MetadataCache(object):
+    ''' SQLite backed cache of decoded header tags
+
+        path - the database file, ':memory:' works too
+        tags - the tags stored for each package, changing the tag set
+        (e.g. when tags are added to rpmdefs.RPMTAGS) drops the entries
+        stored for the previous one
+        max_entries - number of packages kept, the least recently used
+        are evicted, None for no limit
+        flush_interval - number of changes committed in one transaction
+
+    changes are kept in memory or in an open transaction and written
+    by flush, every flush_interval changes and on close. eviction
+    happens on flush, the cache can hold more than max_entries between
+    two flushes.
+    '''
+    def __init__(self, path, tags=rpmdefs.RPMTAGS, max_entries=None,
+                 flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.tags = tuple(tags)
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self.used = dict()
+        self.changes = 0
+        self.db = sqlite3.connect(path)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT);
+            CREATE TABLE IF NOT EXISTS packages (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                inode INTEGER,
+                tags TEXT,
+                used INTEGER);
+            CREATE INDEX IF NOT EXISTS packages_used ON packages (used);
+            ''')
+        version = tags_version(self.tags)
+        row = self.db.execute("SELECT value FROM meta "
+                              "WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            with self.db:
+                self.db.execute("DELETE FROM packages")
+                self.db.execute("INSERT OR REPLACE INTO meta (key, value) "
+                                "VALUES ('version', ?)", (version, ))
+        self.clock, self.count = self.db.execute(
+            "SELECT coalesce(max(used), 0), count(*) FROM packages").fetchone()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    def __changed(self):
+        self.changes += 1
+        if self.changes >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        ''' writes the LRU clock updates, evicts and commits
+        '''
+        if self.used:
+            self.db.executemany("UPDATE packages SET used = ? "
+                                "WHERE path = ?",
+                                [(used, path)
+                                 for path, used in self.used.items()])
+            self.used.clear()
+        self.evict()
+        self.db.commit()
+        self.changes = 0
+
+    def lookup(self, path, identity=None):
+        ''' returns the cached tag -> value dict of path, or None when
+        the file is not cached or changed since it was
+        '''
+        if identity is None:
+            identity = file_identity(path)
+        row = self.db.execute("SELECT size, mtime_ns, inode, tags "
+                              "FROM packages WHERE path = ?",
+                              (path, )).fetchone()
+        if row is None or tuple(row[:3]) != tuple(identity):
+            self.misses += 1
+            return None
+        try:
+            values = decode_values(row[3])
+        except (ValueError, TypeError, IndexError):
+            # not written by this cache, parsed again
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.used[path] = self.clock
+        self.__changed()
+        return values
+
+    def store(self, path, identity, values):
+        ''' stores the tag -> value dict of path
+        '''
+        self.clock += 1
+        self.used.pop(path, None)
+        data = encode_values(values)
+        cursor = self.db.execute("UPDATE packages SET size = ?, "
+                                 "mtime_ns = ?, inode = ?, tags = ?, "
+                                 "used = ? WHERE path = ?",
+                                 tuple(identity) +
+                                 (data, self.clock, path, ))
+        if not cursor.rowcount:
+            self.db.execute("INSERT INTO packages (path, size, mtime_ns, "
+                            "inode, tags, used) VALUES (?, ?, ?, ?, ?, ?)",
+                            (path, ) + tuple(identity) +
+                            (data, self.clock, ))
+            self.count += 1
+        self.__changed()
+
+    def evict(self):
+        ''' drops the least recently used entries above max_entries,
+        in the current transaction
+        '''
+        if self.max_entries is None or self.count <= self.max_entries:
+            return
+        excess = self.count - self.max_entries
+        self.db.execute("DELETE FROM packages WHERE path IN "
+                        "(SELECT path FROM packages ORDER BY used LIMIT ?)",
+                        (excess, ))
+        self.count -= excess
+
+    def get(self, path):
+        ''' returns the tag -> value dict of path from the cache, the
+        package is parsed and cached on a miss
+        '''
+        identity = file_identity(path)
+        values = self.lookup(path, identity)
+        if values is None:
+            values = read_tags(path, self.tags)
+            self.store(path, identity, values)
+        return values
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+package catalog
+
+a compact in-memory catalog for many packages: each package is a
+PackageRecord holding only the decoded values of a few tags, in
+__slots__, with the strings many packages share (arch, license, group,
+vendor, versions...) interned. the RPM objects, their headers and data
+stores are dropped once the values are read.
+
+    >>> catalog = Catalog.load(find_packages(['/srv/mirror']), workers=8)
+    >>> catalog.filter(name='bash', arch=('x86_64', 'noarch'))
+    [<PackageRecord bash-0:4.2-1.x86_64>]
+
+filters are answered from name, arch and version indexes.
+
+'''
+
+import sys
+
+from pyrpm import rpmdefs
+from pyrpm.rpm import RPM, RPMError, first
+from pyrpm.scanner import parallel_map
+
+# tags kept, in the PackageRecord field order (after the key)
+RECORD_TAGS = (
+    ('name', rpmdefs.RPMTAG_NAME),
+    ('epoch', rpmdefs.RPMTAG_EPOCH),
+    ('version', rpmdefs.RPMTAG_VERSION),
+    ('release', rpmdefs.RPMTAG_RELEASE),
+    ('arch', rpmdefs.RPMTAG_ARCH),
+    ('license', rpmdefs.RPMTAG_LICENSE),
+    ('group', rpmdefs.RPMTAG_GROUP),
+    ('vendor', rpmdefs.RPMTAG_VENDOR),
+    ('sourcerpm', rpmdefs.RPMTAG_SOURCERPM),
+    ('buildtime', rpmdefs.RPMTAG_BUILDTIME),
+    ('size', rpmdefs.RPMTAG_SIZE),
+)
+
+
+def record_values(rpm):
+    ''' the RECORD_TAGS values of a package, arrays and lists are
+    reduced to their first item
+    '''
+    values = [first(rpm[tag]) for field, tag in RECORD_TAGS]
+    if rpm.source:
+        values[4] = 'src'
+    return tuple(values)
+
+
+def read_values(path):
+    ''' the record values of the package at path, or the error
+    '''
+    try:
+        with RPM.open(path) as rpm:
+            return path, record_values(rpm), None
+    except (RPMError, Exception) as error:
+        return path, None, '%s' % (error, )
+
+
+class PackageRecord(object):
+    ''' the catalog entry of a package, key identifies it (a path...)
+    '''
+    __slots__ = ('key', ) + tuple(field for field, _ in RECORD_TAGS)
+
+    def __init__(self, key, name, epoch, version, release, arch, license,
+                 group, vendor, sourcerpm, buildtime, size):
+        intern = sys.intern
+        self.key = key
+        self.name = intern(name) if name is not None else None
+        self.epoch = epoch
+        self.version = intern(version) if version is not None else None
+        self.release = intern(release) if release is not None else None
+        self.arch = intern(arch) if arch is not None else None
+        self.license = intern(license) if license is not None else None
+        self.group = intern(group) if group is not None else None
+        self.vendor = intern(vendor) if vendor is not None else None
+        self.sourcerpm = sourcerpm
+        self.buildtime = buildtime
+        self.size = size
+
+    @classmethod
+    def from_rpm(cls, key, rpm):
+        return cls(key, *record_values(rpm))
+
+    def __repr__(self):
+        return '<PackageRecord %s>' % (self.nevra(), )
+
+    def nevra(self):
+        return '%s-%d:%s-%s.%s' % (self.name, self.epoch or 0, self.version,
+                                   self.release, self.arch)
+
+
+def choices(value):
+    ''' a filter value, a string or a collection of alternatives
+    '''
+    if value is None or isinstance(value, str):
+        return value
+    return frozenset(value)
+
+
+class Catalog(object):
+    ''' PackageRecords indexed by key, name, arch and version
+    '''
+    def __init__(self, records=()):
+        self.records = dict()
+        self.by_name = dict()
+        self.by_arch = dict()
+        self.by_version = dict()
+        self.errors = []
+        for record in records:
+            self.add_record(record)
+
+    @classmethod
+    def load(cls, paths, workers=None, chunksize=64):
+        ''' a catalog of the packages at paths, keyed by path, parsed in
+        worker processes (see scanner.scan), the paths that could not be
+        read are in errors
+        '''
+        catalog = cls()
+        for path, values, error in parallel_map(read_values, paths, workers,
+                                                chunksize):
+            if error is not None:
+                catalog.errors.append((path, error))
+            else:
+                catalog.add_record(PackageRecord(path, *values))
+        return catalog
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    def add(self, key, rpm):
+        ''' add the RPM rpm under key, nothing of rpm is kept
+        '''
+        record = PackageRecord.from_rpm(key, rpm)
+        self.add_record(record)
+        return record
+
+    def add_record(self, record):
+        ''' add a PackageRecord, a record with the same key is replaced
+        '''
+        if record.key in self.records:
+            self.remove(record.key)
+        self.records[record.key] = record
+        self.by_name.setdefault(record.name, set()).add(record)
+        self.by_arch.setdefault(record.arch, set()).add(record)
+        self.by_version.setdefault(record.version, set()).add(record)
+
+    def remove(self, key):
+        record = self.records.pop(key)
+        for index, value in ((self.by_name, record.name),
+                             (self.by_arch, record.arch),
+                             (self.by_version, record.version)):
+            records = index[value]
+            records.discard(record)
+            if not records:
+                del index[value]
+
+    def __lookup(self, index, value):
+        if isinstance(value, str):
+            return index.get(value, ())
+        records = set()
+        for choice in value:
+            records.update(index.get(choice, ()))
+        return records
+
+    def filter(self, name=None, arch=None, version=None, release=None):
+        ''' the records matching all the given values, each a string or
+        a collection of alternatives, sorted by key
+
+        the smallest index candidates are checked against the rest
+        '''
+        filters = [(index, choices(value)) for index, value in
+                   ((self.by_name, name), (self.by_arch, arch),
+                    (self.by_version, version)) if value is not None]
+        if filters:
+            candidates = min((self.__lookup(index, value)
+                              for index, value in filters), key=len)
+        else:
+            candidates = self.records.values()
+        name, arch, version, release = (choices(name), choices(arch),
+                                         choices(version), choices(release))
+
+        def match(value, wanted):
+            if wanted is None:
+                return True
+            if isinstance(wanted, str):
+                return value == wanted
+            return value in wanted
+
+        return sorted((record for record in candidates
+                       if match(record.name, name) and
+                       match(record.arch, arch) and
+                       match(record.version, version) and
+                       match(record.release, release)),
+                      key=lambda record: record.key)
+
+    def names(self):
+        ''' the package names in the catalog
+        '''
+        return sorted(self.by_name)
+
+    def arches(self):
+        ''' the architectures in the catalog
+        '''
+        return sorted(self.by_arch)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+file lists
+
+the file list of a package is kept the way the header stores it:
+shared dirnames, integer dirindexes and per file basenames, sizes,
+modes and mtimes arrays. full paths are only joined when asked for.
+
+'''
+
+from array import array
+
+from pyrpm.rpm import array_typecode
+
+
+class FileList(object):
+    ''' columnar view of a package file list
+
+        dirnames - the directories, with a trailing '/'
+        dirindexes - per file index in dirnames
+        basenames - per file name in its directory
+        sizes, modes, mtimes - per file arrays, None when the
+        package does not have them
+    '''
+    def __init__(self, dirnames, dirindexes, basenames,
+                 sizes=None, modes=None, mtimes=None):
+        if len(dirindexes) != len(basenames):
+            raise ValueError('dirindexes and basenames lengths differ')
+        self.dirnames = dirnames
+        self.dirindexes = dirindexes
+        self.basenames = basenames
+        self.sizes = sizes
+        self.modes = modes
+        self.mtimes = mtimes
+        self.__index = None
+
+    @classmethod
+    def from_paths(cls, paths, sizes=None, modes=None, mtimes=None):
+        ''' builds a file list from full paths, as found in the
+        OLDFILENAMES tag of old packages
+        '''
+        dirnames = []
+        dirs = dict()
+        dirindexes = array(array_typecode(4))
+        basenames = []
+        for path in paths:
+            dirname, _, basename = path.rpartition('/')
+            dirname += '/'
+            index = dirs.get(dirname)
+            if index is None:
+                index = dirs[dirname] = len(dirnames)
+                dirnames.append(dirname)
+            dirindexes.append(index)
+            basenames.append(basename)
+        return cls(dirnames, dirindexes, basenames, sizes, modes, mtimes)
+
+    def __len__(self):
+        return len(self.basenames)
+
+    def __getitem__(self, index):
+        ''' the full path of the file at index
+        '''
+        return self.dirnames[self.dirindexes[index]] + self.basenames[index]
+
+    def __iter__(self):
+        dirnames = self.dirnames
+        for dirindex, basename in zip(self.dirindexes, self.basenames):
+            yield dirnames[dirindex] + basename
+
+    def __contains__(self, path):
+        return self.find(path) is not None
+
+    def __repr__(self):
+        return '<FileList %d files in %d dirs>' % (len(self),
+                                                   len(self.dirnames), )
+
+    def __build_index(self):
+        ''' dirname -> {basename: file index}, the strings are the
+        ones already held by dirnames and basenames
+        '''
+        index = dict((dirname, dict()) for dirname in self.dirnames)
+        dirnames = self.dirnames
+        for position, (dirindex, basename) in enumerate(
+                zip(self.dirindexes, self.basenames)):
+            index[dirnames[dirindex]].setdefault(basename, position)
+        self.__index = index
+
+    def find(self, path):
+        ''' returns the index of path in the file list, or None,
+        paths are absolute
+        '''
+        if not path.startswith('/'):
+            return None
+        if self.__index is None:
+            self.__build_index()
+        dirname, _, basename = path.rpartition('/')
+        files = self.__index.get(dirname + '/')
+        if files is None:
+            return None
+        return files.get(basename)
+
+    def index(self, path):
+        ''' returns the index of path in the file list, raises
+        ValueError when the package does not have it
+        '''
+        position = self.find(path)
+        if position is None:
+            raise ValueError('%r not in file list' % (path, ))
+        return position
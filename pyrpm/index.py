@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+repository dependency index
+
+collects the Provides/Requires of many packages into inverted indexes
+so what-provides, what-requires and unresolved dependencies queries are
+dictionary lookups.
+
+    >>> index = RepositoryIndex()
+    >>> for path in paths:
+    ...     with RPM.open(path) as rpm:
+    ...         index.add(path, rpm)
+    >>> index.what_provides('/bin/sh')
+    frozenset({'bash-4.2-1.x86_64.rpm'})
+
+'''
+
+import re
+import sys
+
+from pyrpm import rpmdefs
+
+# files that implicitly provide their path, the ones packages
+# usually require (same rule as createrepo primary file lists)
+PRIMARY_FILES = re.compile(r'^(/etc/|/usr/lib/sendmail$|.*bin/)')
+
+
+def dependencies(rpm, names, flags, versions):
+    ''' returns the (name, flags, version) tuples of a dependency type,
+    names, flags and versions are the tags holding them
+    '''
+    names = rpm[names] or ()
+    flags = rpm[flags] or [rpmdefs.RPMSENSE_ANY] * len(names)
+    versions = rpm[versions] or [''] * len(names)
+    return tuple(zip(names, flags, versions))
+
+
+def provides(rpm):
+    ''' the Provides of a package, the package name is always provided
+    '''
+    value = dependencies(rpm, rpmdefs.RPMTAG_PROVIDENAME,
+                         rpmdefs.RPMTAG_PROVIDEFLAGS,
+                         rpmdefs.RPMTAG_PROVIDEVERSION)
+    name = rpm[rpmdefs.RPMTAG_NAME]
+    if name is not None and name not in [provide[0] for provide in value]:
+        value += ((name, rpmdefs.RPMSENSE_ANY, ''), )
+    return value
+
+
+def requires(rpm):
+    ''' the Requires of a package
+    '''
+    return dependencies(rpm, rpmdefs.RPMTAG_REQUIRENAME,
+                        rpmdefs.RPMTAG_REQUIREFLAGS,
+                        rpmdefs.RPMTAG_REQUIREVERSION)
+
+
+def primary_files(rpm):
+    ''' the files of a package that are indexed as provides
+    '''
+    return tuple(path for path in rpm.files() if PRIMARY_FILES.match(path))
+
+
+class RepositoryIndex(object):
+    ''' inverted Provides/Requires index of a set of packages
+
+    packages are identified by a hashable key of the caller choosing
+    (a path, a NEVRA...), names and versions are interned so packages
+    share them.
+
+    the key sets are frozen on the first query and returned as is,
+    so repeated queries do not copy them, and thawed again when a
+    package changes them.
+    '''
+    def __init__(self):
+        self.packages = dict()
+        self.providers = dict()
+        self.requirers = dict()
+        self.unresolved_names = set()
+
+    def __len__(self):
+        return len(self.packages)
+
+    def __contains__(self, key):
+        return key in self.packages
+
+    def __iter__(self):
+        return iter(self.packages)
+
+    def add(self, key, rpm):
+        ''' index the dependencies of the RPM rpm under key
+        '''
+        self.add_dependencies(key, provides(rpm), requires(rpm),
+                              primary_files(rpm))
+
+    def add_dependencies(self, key, provides, requires, files=()):
+        ''' index a package under key, a package already indexed under
+        key is replaced
+
+            provides, requires - (name, flags, version) tuples
+            files - paths provided by the package
+        '''
+        if key in self.packages:
+            self.remove(key)
+        intern = sys.intern
+        provides = tuple((intern(name), flags, intern(version))
+                         for name, flags, version in provides)
+        requires = tuple((intern(name), flags, intern(version))
+                         for name, flags, version in requires)
+        files = tuple(intern(path) for path in files)
+        self.packages[key] = (provides, requires, files)
+
+        for name in set([provide[0] for provide in provides] + list(files)):
+            self.__keys(self.providers, name).add(key)
+            self.unresolved_names.discard(name)
+        for name in set(require[0] for require in requires):
+            self.__keys(self.requirers, name).add(key)
+            if name not in self.providers and not self.__implicit(name):
+                self.unresolved_names.add(name)
+
+    def remove(self, key):
+        ''' drop the package indexed under key
+        '''
+        provides, requires, files = self.packages.pop(key)
+        for name in set([provide[0] for provide in provides] + list(files)):
+            keys = self.__keys(self.providers, name)
+            keys.discard(key)
+            if not keys:
+                del self.providers[name]
+                if name in self.requirers:
+                    self.unresolved_names.add(name)
+        for name in set(require[0] for require in requires):
+            keys = self.__keys(self.requirers, name)
+            keys.discard(key)
+            if not keys:
+                del self.requirers[name]
+                self.unresolved_names.discard(name)
+
+    def __keys(self, index, name):
+        ''' the mutable key set of name in index
+        '''
+        keys = index.get(name)
+        if keys is None:
+            keys = index[name] = set()
+        elif isinstance(keys, frozenset):
+            keys = index[name] = set(keys)
+        return keys
+
+    def __frozen(self, index, name):
+        ''' the key set of name in index, frozen in place
+        '''
+        keys = index.get(name)
+        if keys is None:
+            return frozenset()
+        if not isinstance(keys, frozenset):
+            keys = index[name] = frozenset(keys)
+        return keys
+
+    def __implicit(self, name):
+        ''' dependencies on rpm itself, never provided by a package
+        '''
+        return name.startswith('rpmlib(')
+
+    def provides(self, key):
+        ''' the (name, flags, version) Provides of a package
+        '''
+        return self.packages[key][0]
+
+    def requires(self, key):
+        ''' the (name, flags, version) Requires of a package
+        '''
+        return self.packages[key][1]
+
+    def what_provides(self, name):
+        ''' keys of the packages providing name, a capability or a path
+        '''
+        return self.__frozen(self.providers, name)
+
+    def what_requires(self, name):
+        ''' keys of the packages requiring name
+        '''
+        return self.__frozen(self.requirers, name)
+
+    def unresolved(self):
+        ''' dependency name -> keys of the packages requiring it,
+        for the requirements no package provides
+        '''
+        return dict((name, self.__frozen(self.requirers, name))
+                    for name in self.unresolved_names)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+payload reader
+
+streams the compressed cpio (newc) archive following the headers, file
+entries are yielded lazily and the data of the files not read is
+decompressed in bounded chunks and dropped.
+
+    >>> with RPM.open('package-1.0-r1.i586.rpm') as rpm:
+    ...     rpm.payload().extract(['/etc/package.conf'])
+    {'/etc/package.conf': b'...'}
+
+'''
+
+import bz2
+import lzma
+import zlib
+
+from pyrpm.rpm import RPMError
+
+CHUNK_SIZE = 64 * 1024
+
+CPIO_MAGIC = (b'070701', b'070702', )
+CPIO_HEADER_SIZE = 110
+CPIO_TRAILER = 'TRAILER!!!'
+
+ZLIB_DECOMPRESSOR = type(zlib.decompressobj())
+
+
+def zstd_reader(fileobj, chunk_size=CHUNK_SIZE):
+    ''' a zstandard stream reader over fileobj, reading chunk_size
+    compressed bytes at a time and returning at most the size asked for
+    '''
+    try:
+        import zstandard
+    except ImportError:
+        raise RPMError('zstd payloads need the zstandard module')
+    return zstandard.ZstdDecompressor().stream_reader(fileobj,
+                                                      read_size=chunk_size)
+
+
+def decompressor(compressor):
+    ''' returns a decompressor object for a PAYLOADCOMPRESSOR value,
+    zstd payloads are read with zstd_reader instead
+    '''
+    if compressor in (None, 'gzip'):
+        # rpm default, zlib skips the gzip header with wbits 16 + MAX_WBITS
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if compressor == 'bzip2':
+        return bz2.BZ2Decompressor()
+    if compressor == 'xz':
+        return lzma.LZMADecompressor(lzma.FORMAT_XZ)
+    if compressor == 'lzma':
+        return lzma.LZMADecompressor(lzma.FORMAT_ALONE)
+    if compressor == 'identity':
+        return None
+    raise RPMError('unknown payload compressor %r' % (compressor, ))
+
+
+class DecompressedStream(object):
+    ''' read only stream over the decompressed payload, at most
+    chunk_size bytes of compressed input are held at once
+    '''
+    def __init__(self, fileobj, compressor=None, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        if compressor == 'zstd':
+            # read like an uncompressed payload
+            self.fileobj = zstd_reader(fileobj, chunk_size)
+            self.decompressor = None
+        else:
+            self.fileobj = fileobj
+            self.decompressor = decompressor(compressor)
+        self.pending = b''
+        self.eof = False
+
+    def __decompress(self, size):
+        ''' returns up to size decompressed bytes, b'' at the end
+        '''
+        decompressor = self.decompressor
+        while not self.eof:
+            if decompressor is None:
+                data = self.fileobj.read(min(size, self.chunk_size))
+                if not data:
+                    self.eof = True
+                return bytes(data)
+            if isinstance(decompressor, ZLIB_DECOMPRESSOR):
+                chunk = self.pending
+                if not chunk:
+                    chunk = self.fileobj.read(self.chunk_size)
+                data = decompressor.decompress(chunk, size)
+                self.pending = decompressor.unconsumed_tail
+                exhausted = not data and not chunk
+            elif decompressor.needs_input:
+                chunk = self.fileobj.read(self.chunk_size)
+                data = decompressor.decompress(chunk, size)
+                exhausted = not data and not chunk
+            else:
+                data = decompressor.decompress(b'', size)
+                exhausted = False
+            if decompressor.eof:
+                self.eof = True
+            elif exhausted:
+                raise RPMError('invalid RPM payload, compressed data '
+                               'is truncated')
+            if data:
+                return data
+        return b''
+
+    def read(self, size):
+        ''' read size bytes, less only at the end of the payload
+        '''
+        chunks = []
+        while size > 0:
+            data = self.__decompress(min(size, self.chunk_size))
+            if not data:
+                break
+            chunks.append(data)
+            size -= len(data)
+        return b''.join(chunks)
+
+    def skip(self, size):
+        ''' drop size bytes, returns how many were dropped
+        '''
+        skipped = 0
+        while skipped < size:
+            data = self.__decompress(min(size - skipped, self.chunk_size))
+            if not data:
+                break
+            skipped += len(data)
+        return skipped
+
+
+class CpioEntry(object):
+    ''' a file of the payload archive, read returns the file data
+    and is only valid until the next entry is reached
+    '''
+    __slots__ = ('name', 'ino', 'mode', 'uid', 'gid', 'nlink', 'mtime',
+                 'size', 'devmajor', 'devminor', 'rdevmajor', 'rdevminor',
+                 'remaining', 'stream', )
+
+    def __init__(self, name, fields, stream):
+        self.name = name
+        (self.ino, self.mode, self.uid, self.gid, self.nlink, self.mtime,
+         self.size, self.devmajor, self.devminor, self.rdevmajor,
+         self.rdevminor) = fields
+        self.remaining = self.size
+        self.stream = stream
+
+    def __repr__(self):
+        return '<CpioEntry %r %d bytes>' % (self.name, self.size, )
+
+    @property
+    def path(self):
+        ''' the absolute path the file installs to
+        '''
+        return self.name[1:] if self.name.startswith('./') else self.name
+
+    def read(self, size=-1):
+        ''' read size bytes of the file data, all of it by default
+        '''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.stream.read(size)
+        if len(data) != size:
+            raise RPMError('invalid RPM payload, %s data is truncated'
+                           % (self.name, ))
+        self.remaining -= size
+        return data
+
+
+class Payload(object):
+    ''' the cpio (newc) archive of a package
+
+        fileobj - stream positioned at the start of the payload
+        compressor - the PAYLOADCOMPRESSOR tag value
+    '''
+    def __init__(self, fileobj, compressor=None, chunk_size=CHUNK_SIZE):
+        self.stream = DecompressedStream(fileobj, compressor, chunk_size)
+        self.current = None
+
+    def __skip(self, size):
+        if self.stream.skip(size) != size:
+            raise RPMError('invalid RPM payload, archive is truncated')
+
+    def __iter__(self):
+        while True:
+            if self.current is not None:
+                entry = self.current
+                self.__skip(entry.remaining + (-entry.size % 4))
+                entry.remaining = 0
+                self.current = None
+            header = self.stream.read(CPIO_HEADER_SIZE)
+            if len(header) != CPIO_HEADER_SIZE or \
+                    header[:6] not in CPIO_MAGIC:
+                raise RPMError('invalid RPM payload, bad cpio header')
+            try:
+                fields = [int(header[offset:offset + 8], 16)
+                          for offset in range(6, CPIO_HEADER_SIZE, 8)]
+            except ValueError:
+                raise RPMError('invalid RPM payload, bad cpio header')
+            namesize = fields[11]
+            name = self.stream.read(namesize)
+            if len(name) != namesize:
+                raise RPMError('invalid RPM payload, archive is truncated')
+            self.__skip(-(CPIO_HEADER_SIZE + namesize) % 4)
+            name = name.rstrip(b'\x00').decode('utf-8', 'surrogateescape')
+            if name == CPIO_TRAILER:
+                return
+            self.current = CpioEntry(name, fields[:11], self.stream)
+            yield self.current
+
+    def extract(self, paths):
+        ''' returns a path -> data dict for the files of paths found in
+        the payload, reading stops once they are all found
+        '''
+        wanted = set(paths)
+        found = dict()
+        for entry in self:
+            if entry.path in wanted:
+                found[entry.path] = entry.read()
+                if len(found) == len(wanted):
+                    break
+        return found
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+remote packages
+
+reads the headers of packages on HTTP mirrors with range requests: a
+first small range covers the lead and the signature header, which give
+the exact extent of the main header, fetched with a second range. the
+payload is never downloaded and connections are kept alive and reused
+across packages of the same host.
+
+    >>> with RemoteReader() as remote:
+    ...     for url in urls:
+    ...         print(remote.open(url).filename())
+
+'''
+
+import http.client
+import struct
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from pyrpm import rpmdefs
+from pyrpm.rpm import RPM, RPMError, align, header_size
+
+PROBE_SIZE = 16 * 1024
+
+
+def header_extent(data, lead_size=RPM.LEAD_SIZE):
+    ''' returns the offset where the payload starts from the first
+    bytes of a package, or the number of bytes needed to know it
+    (a negative number) when data is too short
+    '''
+    headerfmt = '!3sc4sll'
+    if len(data) < lead_size + 16:
+        return -(lead_size + 16)
+    magic, _, _, count, size = struct.unpack_from(headerfmt, data, lead_size)
+    if magic != rpmdefs.RPM_HEADER_MAGIC_NUMBER:
+        raise RPMError('invalid RPM file, signature header '
+                       'not found at offset %d' % (lead_size, ))
+    offset = align(lead_size + header_size(count, size))
+    if len(data) < offset + 16:
+        return -(offset + 16)
+    magic, _, _, count, size = struct.unpack_from(headerfmt, data, offset)
+    if magic != rpmdefs.RPM_HEADER_MAGIC_NUMBER:
+        raise RPMError('invalid RPM file, main header '
+                       'not found at offset %d' % (offset, ))
+    return offset + header_size(count, size)
+
+
+class RemoteReader(object):
+    ''' fetches the headers of remote packages
+
+        probe_size - size of the first range request, large enough for
+        the lead and signature header of most packages
+        timeout - connection timeout in seconds
+
+    keeps one connection per host, not safe to share between threads
+    '''
+    def __init__(self, probe_size=PROBE_SIZE, timeout=30):
+        self.probe_size = probe_size
+        self.timeout = timeout
+        self.connections = dict()
+        self.requests = 0
+        self.bytes_received = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+        self.connections.clear()
+
+    def __connection(self, scheme, netloc):
+        connection = self.connections.get((scheme, netloc))
+        if connection is None:
+            if scheme == 'https':
+                factory = http.client.HTTPSConnection
+            elif scheme == 'http':
+                factory = http.client.HTTPConnection
+            else:
+                raise ValueError('unsupported url scheme %r' % (scheme, ))
+            connection = factory(netloc, timeout=self.timeout)
+            self.connections[(scheme, netloc)] = connection
+        return connection
+
+    def fetch(self, url, start, end):
+        ''' returns the bytes start to end (excluded) of url
+        '''
+        scheme, netloc, path, query, _ = urlsplit(url)
+        if query:
+            path += '?' + query
+        headers = {'Range': 'bytes=%d-%d' % (start, end - 1)}
+        # a kept alive connection may have been closed by the server,
+        # retry once on a fresh one
+        for attempt in (0, 1):
+            connection = self.__connection(scheme, netloc)
+            try:
+                connection.request('GET', path or '/', headers=headers)
+                response = connection.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                connection.close()
+                del self.connections[(scheme, netloc)]
+                if attempt:
+                    raise
+        self.requests += 1
+        if response.status == 206:
+            data = response.read()
+        elif response.status == 200:
+            # no range support, read what is needed and drop the rest
+            data = response.read(end)[start:]
+            connection.close()
+            del self.connections[(scheme, netloc)]
+        else:
+            response.read()
+            raise IOError('HTTP %d %s fetching %s'
+                          % (response.status, response.reason, url, ))
+        self.bytes_received += len(data)
+        return data
+
+    def fetch_headers(self, url):
+        ''' returns the lead and headers of the package at url
+        '''
+        size = self.probe_size
+        data = self.fetch(url, 0, size)
+        end = header_extent(data)
+        while end < 0:
+            if len(data) < size:
+                raise RPMError('invalid RPM file, headers are truncated')
+            # the signature header did not fit the probe
+            size = max(-end, size * 2)
+            data += self.fetch(url, len(data), size)
+            end = header_extent(data)
+        if end > len(data):
+            data += self.fetch(url, len(data), end)
+            if len(data) < end:
+                raise RPMError('invalid RPM file, headers are truncated')
+        return data[:end]
+
+    def open(self, url, strict=True):
+        ''' parses the headers of the package at url, the payload
+        is not fetched
+        '''
+        return RPM(BytesIO(self.fetch_headers(url)), strict=strict)
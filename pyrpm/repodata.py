@@ -0,0 +1,657 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+repodata generator
+
+writes createrepo style metadata (primary, filelists and other XML, and
+optionally the primary SQLite database) for a directory of packages.
+
+a state database keeps, for every package, its file identity and its
+already rendered XML records: on update only new or modified packages
+are parsed (in parallel worker processes), removed ones are dropped,
+and the metadata files are streamed out of the stored records.
+
+    >>> builder = RepodataBuilder('/srv/mirror/os', workers=8)
+    >>> builder.update()
+    {'added': 2, 'updated': 0, 'removed': 1, 'unchanged': 49997, 'errors': []}
+
+'''
+
+import argparse
+import bz2
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sqlite3
+import stat
+import sys
+import tempfile
+import time
+from xml.sax.saxutils import escape, quoteattr
+
+from pyrpm import rpmdefs
+from pyrpm.cache import file_identity
+from pyrpm.index import PRIMARY_FILES
+from pyrpm.rpm import RPM, RPMError, first
+from pyrpm.scanner import find_packages, parallel_map
+
+# bump when the stored records change
+STATE_FORMAT = 1
+
+CHECKSUM_TYPE = 'sha256'
+CHUNK_SIZE = 1024 * 1024
+
+NS_COMMON = 'http://linux.duke.edu/metadata/common'
+NS_FILELISTS = 'http://linux.duke.edu/metadata/filelists'
+NS_OTHER = 'http://linux.duke.edu/metadata/other'
+NS_REPO = 'http://linux.duke.edu/metadata/repo'
+NS_RPM = 'http://linux.duke.edu/metadata/rpm'
+
+# metadata files written by RepodataBuilder, old ones are removed
+METADATA_FILE = re.compile(r'^([0-9a-f]+-)?((primary|filelists|other)'
+                           r'\.xml\.gz|primary\.sqlite\.bz2)$')
+
+# characters XML 1.0 does not allow
+INVALID_XML = re.compile(u'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+PRE_FLAGS = (rpmdefs.RPMSENSE_PREREQ | rpmdefs.RPMSENSE_SCRIPT_PRE |
+             rpmdefs.RPMSENSE_SCRIPT_POST)
+
+DEPENDENCIES = (
+    ('provides', rpmdefs.RPMTAG_PROVIDENAME, rpmdefs.RPMTAG_PROVIDEFLAGS,
+     rpmdefs.RPMTAG_PROVIDEVERSION),
+    ('requires', rpmdefs.RPMTAG_REQUIRENAME, rpmdefs.RPMTAG_REQUIREFLAGS,
+     rpmdefs.RPMTAG_REQUIREVERSION),
+    ('conflicts', rpmdefs.RPMTAG_CONFLICTNAME, rpmdefs.RPMTAG_CONFLICTFLAGS,
+     rpmdefs.RPMTAG_CONFLICTVERSION),
+    ('obsoletes', rpmdefs.RPMTAG_OBSOLETENAME, rpmdefs.RPMTAG_OBSOLETEFLAGS,
+     rpmdefs.RPMTAG_OBSOLETEVERSION),
+)
+
+FLAGS = {rpmdefs.RPMSENSE_LESS: 'LT',
+         rpmdefs.RPMSENSE_GREATER: 'GT',
+         rpmdefs.RPMSENSE_EQUAL: 'EQ',
+         rpmdefs.RPMSENSE_LESS | rpmdefs.RPMSENSE_EQUAL: 'LE',
+         rpmdefs.RPMSENSE_GREATER | rpmdefs.RPMSENSE_EQUAL: 'GE'}
+
+
+def split_evr(evr):
+    ''' splits '[epoch:]version[-release]' into its parts, the epoch
+    defaults to '0'
+    '''
+    epoch, _, version = evr.rpartition(':')
+    version, _, release = version.partition('-')
+    return (epoch or '0', version, release or None)
+
+
+def file_checksum(path):
+    ''' the CHECKSUM_TYPE hex digest of the file at path
+    '''
+    digest = hashlib.new(CHECKSUM_TYPE)
+    with io.open(path, 'rb') as data:
+        while True:
+            chunk = data.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def package_info(rpm, location, pkgid, identity):
+    ''' the repodata fields of a package, plain json serializable types
+
+        location - path of the package relative to the repository
+        pkgid - checksum of the package file
+        identity - (size, mtime_ns, inode) of the package file
+    '''
+    def text(tag):
+        return first(rpm[tag])
+
+    def number(tag, default=0):
+        return first(rpm[tag], default)
+
+    info = {
+        'pkgid': pkgid,
+        'name': rpm[rpmdefs.RPMTAG_NAME],
+        'arch': 'src' if rpm.source else rpm[rpmdefs.RPMTAG_ARCH],
+        'epoch': '%d' % (number(rpmdefs.RPMTAG_EPOCH), ),
+        'version': rpm[rpmdefs.RPMTAG_VERSION],
+        'release': rpm[rpmdefs.RPMTAG_RELEASE],
+        'summary': text(rpmdefs.RPMTAG_SUMMARY),
+        'description': text(rpmdefs.RPMTAG_DESCRIPTION),
+        'packager': text(rpmdefs.RPMTAG_PACKAGER),
+        'url': text(rpmdefs.RPMTAG_URL),
+        'time_file': identity[1] // 10 ** 9,
+        'time_build': number(rpmdefs.RPMTAG_BUILDTIME),
+        'license': text(rpmdefs.RPMTAG_LICENSE),
+        'vendor': text(rpmdefs.RPMTAG_VENDOR),
+        'group': text(rpmdefs.RPMTAG_GROUP),
+        'buildhost': text(rpmdefs.RPMTAG_BUILDHOST),
+        'sourcerpm': text(rpmdefs.RPMTAG_SOURCERPM),
+        'header_start': rpm.header_offset,
+        'header_end': rpm.payload_offset,
+        'size_package': identity[0],
+        'size_installed': number(rpmdefs.RPMTAG_LONGSIZE,
+                                 number(rpmdefs.RPMTAG_SIZE)),
+        'size_archive': first(
+            rpm.signature.get(rpmdefs.RPMSIGTAG_PAYLOADSIZE),
+            number(rpmdefs.RPMTAG_ARCHIVESIZE)),
+        'location': location,
+    }
+
+    for kind, names, flags, versions in DEPENDENCIES:
+        names = rpm[names] or []
+        flags = rpm[flags] or [0] * len(names)
+        versions = rpm[versions] or [''] * len(names)
+        entries = []
+        for name, flag, version in zip(names, flags, versions):
+            if kind == 'requires' and name.startswith('rpmlib('):
+                continue
+            epoch, ver, rel = split_evr(version) if version else \
+                (None, None, None)
+            entries.append([name, FLAGS.get(flag & 0xf), epoch, ver, rel,
+                            bool(kind == 'requires' and flag & PRE_FLAGS)])
+        info[kind] = entries
+
+    files = rpm.files()
+    modes = files.modes or [0] * len(files)
+    fileflags = rpm[rpmdefs.RPMTAG_FILEFLAGS] or [0] * len(files)
+    entries = []
+    for path, mode, flag in zip(files, modes, fileflags):
+        if flag & rpmdefs.RPMFILE_GHOST:
+            kind = 'ghost'
+        elif stat.S_ISDIR(mode):
+            kind = 'dir'
+        else:
+            kind = 'file'
+        entries.append([path, kind])
+    info['files'] = entries
+
+    names = rpm[rpmdefs.RPMTAG_CHANGELOGNAME] or []
+    times = rpm[rpmdefs.RPMTAG_CHANGELOGTIME] or []
+    texts = rpm[rpmdefs.RPMTAG_CHANGELOGTEXT] or []
+    info['changelogs'] = [list(changelog)
+                          for changelog in zip(names, times, texts)]
+    return info
+
+
+def xml_text(value):
+    return escape(INVALID_XML.sub('', value or ''))
+
+
+def xml_attr(value):
+    return quoteattr(INVALID_XML.sub('', '%s' % (value, )))
+
+
+def xml_version(info):
+    return '<version epoch=%s ver=%s rel=%s/>' % (
+        xml_attr(info['epoch']), xml_attr(info['version']),
+        xml_attr(info['release']))
+
+
+def xml_file(path, kind):
+    if kind == 'file':
+        return '    <file>%s</file>\n' % (xml_text(path), )
+    return '    <file type=%s>%s</file>\n' % (xml_attr(kind), xml_text(path))
+
+
+def primary_xml(info):
+    ''' the primary.xml record of a package
+    '''
+    lines = [
+        '<package type="rpm">\n',
+        '  <name>%s</name>\n' % (xml_text(info['name']), ),
+        '  <arch>%s</arch>\n' % (xml_text(info['arch']), ),
+        '  %s\n' % (xml_version(info), ),
+        '  <checksum type=%s pkgid="YES">%s</checksum>\n'
+        % (xml_attr(CHECKSUM_TYPE), info['pkgid']),
+        '  <summary>%s</summary>\n' % (xml_text(info['summary']), ),
+        '  <description>%s</description>\n'
+        % (xml_text(info['description']), ),
+        '  <packager>%s</packager>\n' % (xml_text(info['packager']), ),
+        '  <url>%s</url>\n' % (xml_text(info['url']), ),
+        '  <time file="%d" build="%d"/>\n' % (info['time_file'],
+                                              info['time_build']),
+        '  <size package="%d" installed="%d" archive="%d"/>\n'
+        % (info['size_package'], info['size_installed'],
+           info['size_archive']),
+        '  <location href=%s/>\n' % (xml_attr(info['location']), ),
+        '  <format>\n',
+        '    <rpm:license>%s</rpm:license>\n' % (xml_text(info['license']), ),
+        '    <rpm:vendor>%s</rpm:vendor>\n' % (xml_text(info['vendor']), ),
+        '    <rpm:group>%s</rpm:group>\n' % (xml_text(info['group']), ),
+        '    <rpm:buildhost>%s</rpm:buildhost>\n'
+        % (xml_text(info['buildhost']), ),
+        '    <rpm:sourcerpm>%s</rpm:sourcerpm>\n'
+        % (xml_text(info['sourcerpm']), ),
+        '    <rpm:header-range start="%d" end="%d"/>\n'
+        % (info['header_start'], info['header_end']),
+    ]
+    for kind, _, _, _ in DEPENDENCIES:
+        if not info[kind]:
+            continue
+        lines.append('    <rpm:%s>\n' % (kind, ))
+        for name, flags, epoch, ver, rel, pre in info[kind]:
+            entry = '      <rpm:entry name=%s' % (xml_attr(name), )
+            if flags:
+                entry += ' flags=%s' % (xml_attr(flags), )
+            if ver is not None:
+                entry += ' epoch=%s ver=%s' % (xml_attr(epoch), xml_attr(ver))
+                if rel is not None:
+                    entry += ' rel=%s' % (xml_attr(rel), )
+            if pre:
+                entry += ' pre="1"'
+            lines.append(entry + '/>\n')
+        lines.append('    </rpm:%s>\n' % (kind, ))
+    for path, kind in info['files']:
+        if PRIMARY_FILES.match(path):
+            lines.append(xml_file(path, kind))
+    lines.append('  </format>\n</package>\n')
+    return ''.join(lines)
+
+
+def filelists_xml(info):
+    ''' the filelists.xml record of a package
+    '''
+    lines = ['<package pkgid="%s" name=%s arch=%s>\n'
+             % (info['pkgid'], xml_attr(info['name']), xml_attr(info['arch'])),
+             '  %s\n' % (xml_version(info), )]
+    for path, kind in info['files']:
+        lines.append(xml_file(path, kind)[2:])
+    lines.append('</package>\n')
+    return ''.join(lines)
+
+
+def other_xml(info):
+    ''' the other.xml record of a package
+    '''
+    lines = ['<package pkgid="%s" name=%s arch=%s>\n'
+             % (info['pkgid'], xml_attr(info['name']), xml_attr(info['arch'])),
+             '  %s\n' % (xml_version(info), )]
+    for author, date, text in info['changelogs']:
+        lines.append('  <changelog author=%s date="%d">%s</changelog>\n'
+                     % (xml_attr(author), date, xml_text(text)))
+    lines.append('</package>\n')
+    return ''.join(lines)
+
+
+def read_record(task):
+    ''' parses a package for the state database, task is the package
+    (path, location, identity), returns a dict with the path and the
+    records, or the path and the error
+    '''
+    path, location, identity = task
+    try:
+        with RPM.open(path) as rpm:
+            info = package_info(rpm, location, file_checksum(path), identity)
+        return {'path': path, 'info': info,
+                'primary': primary_xml(info),
+                'filelists': filelists_xml(info),
+                'other': other_xml(info)}
+    except (RPMError, Exception) as error:
+        return {'path': path, 'error': '%s' % (error, )}
+
+
+class MetadataFile(object):
+    ''' gzip compressed metadata file, keeps the checksum and size of
+    the uncompressed data written
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.open_checksum = hashlib.new(CHECKSUM_TYPE)
+        self.open_size = 0
+        self.file = gzip.open(path, 'wb')
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.open_checksum.update(data)
+        self.open_size += len(data)
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
+
+
+class RepodataBuilder(object):
+    ''' incremental repodata generator for a directory of packages
+
+        directory - the repository, packages are looked for recursively
+        outputdir - where the metadata goes, directory/repodata by default
+        state - the state database, directory/.pyrpm-state.sqlite
+        by default
+        workers - processes parsing new packages, see scanner.scan
+        sqlite - also write the primary SQLite database
+    '''
+    def __init__(self, directory, outputdir=None, state=None, workers=None,
+                 sqlite=False, chunksize=16):
+        self.directory = directory
+        self.outputdir = outputdir or os.path.join(directory, 'repodata')
+        if state is None:
+            state = os.path.join(directory, '.pyrpm-state.sqlite')
+        self.workers = workers
+        self.sqlite = sqlite
+        self.chunksize = chunksize
+        self.db = sqlite3.connect(state)
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT);
+            CREATE TABLE IF NOT EXISTS packages (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                inode INTEGER,
+                info TEXT,
+                primary_xml TEXT,
+                filelists_xml TEXT,
+                other_xml TEXT);
+            ''')
+        version = '%d' % (STATE_FORMAT, )
+        row = self.db.execute("SELECT value FROM meta "
+                              "WHERE key = 'version'").fetchone()
+        if row is None or row[0] != version:
+            with self.db:
+                self.db.execute("DELETE FROM packages")
+                self.db.execute("INSERT OR REPLACE INTO meta (key, value) "
+                                "VALUES ('version', ?)", (version, ))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def update(self, force=False):
+        ''' brings the state and the metadata up to date with the
+        directory, the metadata is only written when packages changed
+        (or force is set)
+
+        returns counts of added, updated, removed and unchanged packages
+        and the (path, error) of the packages that could not be read
+        '''
+        known = dict((row[0], tuple(row[1:])) for row in self.db.execute(
+            "SELECT path, size, mtime_ns, inode FROM packages"))
+        outputdir = os.path.abspath(self.outputdir)
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0,
+                 'errors': []}
+        tasks = []
+        found = set()
+        for path in find_packages([self.directory]):
+            if os.path.abspath(path).startswith(outputdir + os.sep):
+                continue
+            try:
+                identity = file_identity(path)
+            except EnvironmentError as error:
+                stats['errors'].append((path, '%s' % (error, )))
+                continue
+            found.add(path)
+            if known.get(path) == identity:
+                stats['unchanged'] += 1
+                continue
+            location = os.path.relpath(path, self.directory)
+            location = location.replace(os.sep, '/')
+            tasks.append((path, location, identity))
+
+        removed = [path for path in known if path not in found]
+        with self.db:
+            for path in removed:
+                self.db.execute("DELETE FROM packages WHERE path = ?",
+                                (path, ))
+            stats['removed'] = len(removed)
+
+            identities = dict((task[0], task[2]) for task in tasks)
+            # no worker pool for a repository that did not change
+            records = parallel_map(read_record, tasks, self.workers,
+                                   self.chunksize, ordered=False) \
+                if tasks else ()
+            for record in records:
+                path = record['path']
+                if 'error' in record:
+                    stats['errors'].append((path, record['error']))
+                    # a package that became unreadable leaves the metadata
+                    if path in known:
+                        stats['removed'] += 1
+                    self.db.execute("DELETE FROM packages WHERE path = ?",
+                                    (path, ))
+                    continue
+                stats['updated' if path in known else 'added'] += 1
+                self.db.execute(
+                    "INSERT OR REPLACE INTO packages (path, size, mtime_ns, "
+                    "inode, info, primary_xml, filelists_xml, other_xml) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, ) + tuple(identities[path]) +
+                    (json.dumps(record['info']), record['primary'],
+                     record['filelists'], record['other']))
+
+        changed = stats['added'] or stats['updated'] or stats['removed']
+        repomd = os.path.join(self.outputdir, 'repomd.xml')
+        if force or changed or not os.path.exists(repomd):
+            self.write()
+        return stats
+
+    def write(self):
+        ''' writes the metadata from the state database
+        '''
+        count = self.db.execute("SELECT count(*) FROM packages").fetchone()[0]
+        if not os.path.isdir(self.outputdir):
+            os.makedirs(self.outputdir)
+        tmpdir = tempfile.mkdtemp(prefix='.repodata-', dir=self.outputdir)
+        try:
+            files = [
+                ('primary', 'primary_xml',
+                 '<metadata xmlns="%s" xmlns:rpm="%s" packages="%d">\n'
+                 % (NS_COMMON, NS_RPM, count), '</metadata>\n'),
+                ('filelists', 'filelists_xml',
+                 '<filelists xmlns="%s" packages="%d">\n'
+                 % (NS_FILELISTS, count), '</filelists>\n'),
+                ('other', 'other_xml',
+                 '<otherdata xmlns="%s" packages="%d">\n'
+                 % (NS_OTHER, count), '</otherdata>\n'),
+            ]
+            data = []
+            for kind, column, start, end in files:
+                metadata = MetadataFile(os.path.join(tmpdir,
+                                                     kind + '.xml.gz'))
+                metadata.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+                metadata.write(start)
+                for row in self.db.execute("SELECT %s FROM packages "
+                                           "ORDER BY path" % (column, )):
+                    metadata.write(row[0])
+                metadata.write(end)
+                metadata.close()
+                data.append((kind, metadata.path,
+                             metadata.open_checksum.hexdigest(),
+                             metadata.open_size, None))
+            if self.sqlite:
+                data.append(self.__write_sqlite(tmpdir))
+
+            # checksum prefixed names, like createrepo: the files of the
+            # previous and the new repomd.xml never share a name
+            files = []
+            for kind, path, open_checksum, open_size, database in data:
+                checksum = file_checksum(path)
+                name = '%s-%s' % (checksum, os.path.basename(path))
+                os.replace(path, os.path.join(tmpdir, name))
+                files.append((kind, name, checksum, os.path.getsize(
+                    os.path.join(tmpdir, name)), open_checksum, open_size,
+                    database))
+            self.__write_repomd(tmpdir, files)
+
+            # data files first, repomd.xml last, then the old data files
+            names = set(name for _, name, _, _, _, _, _ in files)
+            for name in names:
+                os.replace(os.path.join(tmpdir, name),
+                           os.path.join(self.outputdir, name))
+            os.replace(os.path.join(tmpdir, 'repomd.xml'),
+                       os.path.join(self.outputdir, 'repomd.xml'))
+            for name in os.listdir(self.outputdir):
+                if METADATA_FILE.match(name) and name not in names:
+                    os.remove(os.path.join(self.outputdir, name))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def __href(self, name):
+        ''' the location of a metadata file, relative to the repository
+        '''
+        path = os.path.relpath(os.path.join(self.outputdir, name),
+                               self.directory)
+        return path.replace(os.sep, '/')
+
+    def __write_repomd(self, tmpdir, files):
+        timestamp = int(time.time())
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>\n',
+                 '<repomd xmlns="%s" xmlns:rpm="%s">\n' % (NS_REPO, NS_RPM),
+                 '  <revision>%d</revision>\n' % (timestamp, )]
+        for (kind, name, checksum, size, open_checksum, open_size,
+             database) in files:
+            lines += [
+                '  <data type="%s">\n' % (kind, ),
+                '    <checksum type="%s">%s</checksum>\n'
+                % (CHECKSUM_TYPE, checksum),
+                '    <open-checksum type="%s">%s</open-checksum>\n'
+                % (CHECKSUM_TYPE, open_checksum),
+                '    <location href=%s/>\n' % (xml_attr(self.__href(name)), ),
+                '    <timestamp>%d</timestamp>\n' % (timestamp, ),
+                '    <size>%d</size>\n' % (size, ),
+                '    <open-size>%d</open-size>\n' % (open_size, ),
+            ]
+            if database is not None:
+                lines.append('    <database_version>%d</database_version>\n'
+                             % (database, ))
+            lines.append('  </data>\n')
+        lines.append('</repomd>\n')
+        with io.open(os.path.join(tmpdir, 'repomd.xml'), 'w',
+                     encoding='utf-8') as repomd:
+            repomd.write(''.join(lines))
+
+    def __write_sqlite(self, tmpdir):
+        ''' writes the primary SQLite database (createrepo schema
+        version 10, packages, dependencies and primary files tables)
+        '''
+        path = os.path.join(tmpdir, 'primary.sqlite')
+        db = sqlite3.connect(path)
+        db.executescript('''
+            CREATE TABLE db_info (dbversion INTEGER, checksum TEXT);
+            CREATE TABLE packages (
+                pkgKey INTEGER PRIMARY KEY, pkgId TEXT, name TEXT,
+                arch TEXT, version TEXT, epoch TEXT, release TEXT,
+                summary TEXT, description TEXT, url TEXT, time_file INTEGER,
+                time_build INTEGER, rpm_license TEXT, rpm_vendor TEXT,
+                rpm_group TEXT, rpm_buildhost TEXT, rpm_sourcerpm TEXT,
+                rpm_header_start INTEGER, rpm_header_end INTEGER,
+                rpm_packager TEXT, size_package INTEGER,
+                size_installed INTEGER, size_archive INTEGER,
+                location_href TEXT, location_base TEXT, checksum_type TEXT);
+            CREATE TABLE files (name TEXT, type TEXT, pkgKey INTEGER);
+            CREATE TABLE provides (name TEXT, flags TEXT, epoch TEXT,
+                version TEXT, release TEXT, pkgKey INTEGER);
+            CREATE TABLE requires (name TEXT, flags TEXT, epoch TEXT,
+                version TEXT, release TEXT, pkgKey INTEGER, pre BOOLEAN);
+            CREATE TABLE conflicts (name TEXT, flags TEXT, epoch TEXT,
+                version TEXT, release TEXT, pkgKey INTEGER);
+            CREATE TABLE obsoletes (name TEXT, flags TEXT, epoch TEXT,
+                version TEXT, release TEXT, pkgKey INTEGER);
+            CREATE INDEX packagename ON packages (name);
+            CREATE INDEX packageId ON packages (pkgId);
+            CREATE INDEX filenames ON files (name);
+            CREATE INDEX providesname ON provides (name);
+            CREATE INDEX requiresname ON requires (name);
+            ''')
+        with db:
+            rows = self.db.execute("SELECT info FROM packages ORDER BY path")
+            for key, (info, ) in enumerate(rows, 1):
+                info = json.loads(info)
+                db.execute(
+                    "INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, "
+                    "?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, info['pkgid'], info['name'], info['arch'],
+                     info['version'], info['epoch'], info['release'],
+                     info['summary'], info['description'], info['url'],
+                     info['time_file'], info['time_build'], info['license'],
+                     info['vendor'], info['group'], info['buildhost'],
+                     info['sourcerpm'], info['header_start'],
+                     info['header_end'], info['packager'],
+                     info['size_package'], info['size_installed'],
+                     info['size_archive'], info['location'], None,
+                     CHECKSUM_TYPE))
+                for kind, _, _, _ in DEPENDENCIES:
+                    for name, flags, epoch, ver, rel, pre in info[kind]:
+                        if kind == 'requires':
+                            db.execute("INSERT INTO requires VALUES "
+                                       "(?, ?, ?, ?, ?, ?, ?)",
+                                       (name, flags, epoch, ver, rel, key,
+                                        'TRUE' if pre else 'FALSE'))
+                        else:
+                            db.execute("INSERT INTO %s VALUES "
+                                       "(?, ?, ?, ?, ?, ?)" % (kind, ),
+                                       (name, flags, epoch, ver, rel, key))
+                db.executemany("INSERT INTO files VALUES (?, ?, ?)",
+                               [(name, kind, key)
+                                for name, kind in info['files']
+                                if PRIMARY_FILES.match(name)])
+            db.execute("INSERT INTO db_info VALUES (10, ?)",
+                       (self.__checksum(), ))
+        db.close()
+
+        open_checksum = file_checksum(path)
+        open_size = os.path.getsize(path)
+        with io.open(path, 'rb') as source:
+            with bz2.open(path + '.bz2', 'wb') as target:
+                shutil.copyfileobj(source, target, CHUNK_SIZE)
+        os.remove(path)
+        return ('primary_db', path + '.bz2', open_checksum, open_size, 10)
+
+    def __checksum(self):
+        ''' checksum of the package set, identifies the metadata the
+        database was built for
+        '''
+        digest = hashlib.new(CHECKSUM_TYPE)
+        for (info, ) in self.db.execute("SELECT info FROM packages "
+                                        "ORDER BY path"):
+            digest.update(json.loads(info)['pkgid'].encode('ascii'))
+        return digest.hexdigest()
+
+
+def main(argv=None):
+    ''' pyrpm-repodata command line entry point
+    '''
+    parser = argparse.ArgumentParser(
+        prog='pyrpm-repodata',
+        description='write or update the repodata of a package directory')
+    parser.add_argument('directory', metavar='DIRECTORY')
+    parser.add_argument('-o', '--outputdir',
+                        help='metadata directory '
+                             '(default: DIRECTORY/repodata)')
+    parser.add_argument('--state', metavar='DB',
+                        help='state database '
+                             '(default: DIRECTORY/.pyrpm-state.sqlite)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes '
+                             '(default: number of cpus)')
+    parser.add_argument('--sqlite', action='store_true',
+                        help='also write the primary SQLite database')
+    parser.add_argument('--force', action='store_true',
+                        help='write the metadata even if nothing changed')
+    args = parser.parse_args(argv)
+
+    with RepodataBuilder(args.directory, args.outputdir, args.state,
+                         args.workers, args.sqlite) as builder:
+        stats = builder.update(force=args.force)
+    for path, error in stats['errors']:
+        sys.stderr.write('%s: %s\n' % (path, error, ))
+    sys.stderr.write('%d added, %d updated, %d removed, %d unchanged\n'
+                     % (stats['added'], stats['updated'], stats['removed'],
+                        stats['unchanged']))
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
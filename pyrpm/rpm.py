@@ -9,181 +9,511 @@ PyRPM is a pure python, simple to use, module to read information from a RPM fil
 
 '''
 
+import io
+import mmap
+import os
 import struct
-from io import BytesIO
+import sys
+from array import array
 
 from pyrpm import rpmdefs
 
 
-def find_magic_number(data, magic_number):
+def find_magic_number(data, magic_number, chunk_size=64 * 1024):
     ''' attempts to find a magic number in a stream of bytes
     returns the start position where the magic number was found
     or None if not found
+
+    the stream is read in chunks of chunk_size bytes, a magic number
+    spanning two chunks is still found
     '''
     base = data.tell()
+    keep = len(magic_number) - 1
+    tail = b''
     while True:
-        chunk = data.read(len(magic_number))
-        if not chunk or len(chunk) != len(magic_number):
+        chunk = data.read(chunk_size)
+        if not chunk:
             return None
-        if chunk == magic_number:
-            return base
-        base += 1
-        data.seek(base)
+        buf = tail + chunk
+        pos = buf.find(magic_number)
+        if pos != -1:
+            return base - len(tail) + pos
+        base += len(chunk)
+        tail = buf[len(buf) - keep:] if keep else b''
+
+
+def header_size(index_count, store_size):
+    ''' size of a header structure in the file: the 16 bytes
+    header-header section, the index records and the data store
+    '''
+    return 16 + index_count * 16 + store_size
+
+
+def align(offset, alignment=8):
+    ''' round offset up to the next multiple of alignment
+    '''
+    return (offset + alignment - 1) & ~(alignment - 1)
+
+
+class MemoryReader(object):
+    ''' file like reader over a buffer (bytes, mmap...)
+
+    read returns memoryview slices of the buffer, nothing is copied
+    '''
+    def __init__(self, buffer):
+        self.buffer = memoryview(buffer)
+        self.position = 0
+
+    def read(self, size=-1):
+        start = self.position
+        if size is None or size < 0:
+            end = len(self.buffer)
+        else:
+            end = min(start + size, len(self.buffer))
+        self.position = max(start, end)
+        return self.buffer[start:end]
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += len(self.buffer)
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        self.buffer.release()
+
+
+def array_typecode(itemsize):
+    ''' returns the unsigned array typecode for items of itemsize bytes
+    '''
+    for typecode in 'BHILQ':
+        if array(typecode).itemsize == itemsize:
+            return typecode
+    raise ValueError('no array typecode for %d bytes items' % (itemsize, ))
+
+
+def decode_string(data):
+    ''' header strings are utf-8, old packages carry latin-1 text
+    (packager, changelog...) that is decoded as such
+    '''
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
 
 
 class Entry(object):
     ''' RPM Header Entry
-    '''
-    def __init__(self, entry, store):
-        self.entry = entry
-        self.store = store
 
-        self.switch = {rpmdefs.RPM_DATA_TYPE_CHAR:            self.__readchar,
-                       rpmdefs.RPM_DATA_TYPE_INT8:            self.__readint8,
-                       rpmdefs.RPM_DATA_TYPE_INT16:           self.__readint16,
-                       rpmdefs.RPM_DATA_TYPE_INT32:           self.__readint32,
-                       rpmdefs.RPM_DATA_TYPE_INT64:           self.__readint64,
-                       rpmdefs.RPM_DATA_TYPE_STRING:          self.__readstring,
-                       rpmdefs.RPM_DATA_TYPE_BIN:             self.__readbin,
-                       rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE: self.__readstring}
+    holds the index record of a tag, the value is only decoded
+    from the store when asked for
+    '''
+    __slots__ = ('tag', 'type', 'offset', 'count', 'end', )
 
-        self.store.seek(entry[2])
-        self.value = self.switch[entry[1]]()
-        self.tag = entry[0]
+    def __init__(self, tag, type, offset, count, end=None):
+        ''' end - where the next entry data starts in the store,
+            bounds the string types
+        '''
+        self.tag = tag
+        self.type = type
+        self.offset = offset
+        self.count = count
+        self.end = end
 
     def __str__(self):
-        return "(%s, %s)" % (self.tag, self.value, )
+        return "(%s, %s)" % (self.tag, self.type, )
 
     def __repr__(self):
-        return "<Entry %r %r>" % (self.tag, self.value, )
+        return "<Entry %r %r>" % (self.tag, self.type, )
+
+    def decode(self, store):
+        ''' decode the entry value from the header store,
+        store is the header data store as a bytes like object
+        '''
+        try:
+            decode = self.switch[self.type]
+        except KeyError:
+            raise RPMError('unknown data type %d for tag %d'
+                           % (self.type, self.tag, ))
+        return decode(self, store)
+
+    def __readbytes(self, store, size):
+        ''' read size bytes at the entry offset
+        '''
+        data = store[self.offset:self.offset + size]
+        if len(data) != size:
+            raise RPMError('invalid RPM header, tag %d data is truncated'
+                           % (self.tag, ))
+        return data
+
+    def __readnull(self, store):
+        ''' null entries carry no data
+        '''
+        return None
 
-    def __readchar(self, offset=1):
-        ''' store is a pointer to the store offset
-        where the char should be read
+    def __readchar(self, store):
+        ''' char = 1byte, read as bytes
         '''
-        data = self.store.read(offset)
-        if len(data) != offset:
-            return ""
-        fmt = '!'+str(offset)+'c'
-        value = struct.unpack(fmt, data)
+        return bytes(self.__readbytes(store, self.count))
+
+    def __readints(self, store, itemsize):
+        ''' read the whole count sized array of big endian unsigned
+        integers at once
+        '''
+        value = array(array_typecode(itemsize))
+        value.frombytes(self.__readbytes(store, self.count * itemsize))
+        if sys.byteorder == 'little':
+            value.byteswap()
         return value
 
-    def __readint8(self, offset=1):
+    def __readint8(self, store):
         ''' int8 = 1byte
         '''
-        return self.__readchar(offset)
+        return self.__readints(store, 1)
 
-    def __readint16(self, offset=1):
+    def __readint16(self, store):
         ''' int16 = 2bytes
         '''
-        data = self.store.read(offset*2)
-        fmt = '!'+str(offset)+'i'
-        value = struct.unpack(fmt, data)
-        return value
+        return self.__readints(store, 2)
 
-    def __readint32(self, offset=1):
+    def __readint32(self, store):
         ''' int32 = 4bytes
         '''
-        data = self.store.read(offset*4)
-        fmt = '!'+str(offset)+'i'
-        value = struct.unpack(fmt, data)
-        return value
+        return self.__readints(store, 4)
 
-    def __readint64(self, offset=1):
+    def __readint64(self, store):
         ''' int64 = 8bytes
         '''
-        data = self.store.read(offset*4)
-        fmt = '!'+str(offset)+'l'
-        value = struct.unpack(fmt, data)
-        return value
+        return self.__readints(store, 8)
 
-    def __readstring(self):
+    def __readstrings(self, store):
+        ''' read count '\0' terminated strings, split in one go,
+        the ones that are not utf-8 are latin-1 (see decode_string)
+        '''
+        if self.count < 0:
+            raise RPMError('invalid RPM header, tag %d count is %d'
+                           % (self.tag, self.count, ))
+        end = self.end if self.end is not None else len(store)
+        strings = bytes(store[self.offset:end]).split(b'\x00', self.count)
+        if len(strings) <= self.count:
+            raise RPMError('invalid RPM header, tag %d data is truncated'
+                           % (self.tag, ))
+        del strings[self.count:]
+        try:
+            return list(map(bytes.decode, strings))
+        except UnicodeDecodeError:
+            return list(map(decode_string, strings))
+
+    def __readstring(self, store):
         ''' read a string entry
         '''
-        string = b''
-        while True:
-            char = self.__readchar()
-            if len(char) == 0 or char[0] == b'\x00':  # read until '\0'
-                break
-            string += char[0]
-        return string.decode('utf-8')
-
-    def __readbin(self):
-        ''' read a binary entry
+        if self.count < 1:
+            raise RPMError('invalid RPM header, tag %d count is %d'
+                           % (self.tag, self.count, ))
+        return self.__readstrings(store)[0]
+
+    def __readi18nstring(self, store):
+        ''' read a i18n string entry, only the first (default)
+        translation is returned
+        '''
+        end = self.end if self.end is not None else len(store)
+        string = bytes(store[self.offset:end]).split(b'\x00', 1)
+        if len(string) != 2:
+            raise RPMError('invalid RPM header, tag %d data is truncated'
+                           % (self.tag, ))
+        return decode_string(string[0])
+
+    def __readbin(self, store):
+        ''' read a binary entry, count is the size in bytes
         '''
-        if self.entry[0] == rpmdefs.RPMSIGTAG_MD5:
-            data = self.store.read(rpmdefs.MD5_SIZE)
-            value = struct.unpack('!'+rpmdefs.MD5_SIZE+'s', data)
-            return value
-        elif self.entry[0] == rpmdefs.RPMSIGTAG_PGP:
-            data = self.store.read(rpmdefs.PGP_SIZE)
-            value = struct.unpack('!'+rpmdefs.PGP_SIZE+'s', data)
-            return value
+        return bytes(self.__readbytes(store, self.count))
+
+    # built once for the class, not for every entry
+    switch = {rpmdefs.RPM_DATA_TYPE_NULL:            __readnull,
+              rpmdefs.RPM_DATA_TYPE_CHAR:            __readchar,
+              rpmdefs.RPM_DATA_TYPE_INT8:            __readint8,
+              rpmdefs.RPM_DATA_TYPE_INT16:           __readint16,
+              rpmdefs.RPM_DATA_TYPE_INT32:           __readint32,
+              rpmdefs.RPM_DATA_TYPE_INT64:           __readint64,
+              rpmdefs.RPM_DATA_TYPE_STRING:          __readstring,
+              rpmdefs.RPM_DATA_TYPE_BIN:             __readbin,
+              rpmdefs.RPM_DATA_TYPE_STRING_ARRAY:    __readstrings,
+              rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE: __readi18nstring}
 
 
 class Header(object):
     ''' RPM Header Structure
+
+    the index is parsed once into a tag -> Entry table, values are
+    decoded on first access and cached
     '''
-    def __init__(self, header, entries, store):
-        '''
+    def __init__(self, header, entries, store, stats=None):
+        ''' header - the unpacked header-header section
+            entries - the raw index records, 16 bytes each
+            store - the header data store, a bytes like object
+            stats - a pyrpm.stats.PackageStats timing decoding
         '''
         self.header = header
-        self.entries = entries
         self.store = store
-        self.pentries = []
-        self.rentries = []
+        self.stats = stats
+        self.index = dict()
+        self.values = dict()
 
-        self.__readentries()
+        self.__readentries(entries)
 
-    def __readentry(self, entry):
+    def __readentries(self, entries):
         ''' [4bytes][4bytes][4bytes][4bytes]
                TAG    TYPE   OFFSET  COUNT
         '''
         entryfmt = '!llll'
-        entry = struct.unpack(entryfmt, entry)
-        if entry[0] < rpmdefs.RPMTAG_MIN_NUMBER or\
-                entry[0] > rpmdefs.RPMTAG_MAX_NUMBER:
-            return None
-        return entry
+        for tag, type, offset, count in struct.iter_unpack(entryfmt, entries):
+            self.index[tag] = Entry(tag, type, offset, count)
 
-    def __readentries(self):
-        ''' read a rpm entry
-        '''
-        for entry in self.entries:
-            entry = self.__readentry(entry)
-            if entry:
-                if entry[0] in rpmdefs.RPMTAGS:
-                    self.pentries.append(entry)
+        # the data of an entry ends where the next one starts
+        offsets = set(entry.offset for entry in self.index.values())
+        offsets.add(len(self.store))
+        offsets = sorted(offsets)
+        ends = dict(zip(offsets, offsets[1:]))
+        for entry in self.index.values():
+            entry.end = ends.get(entry.offset, entry.offset)
 
-        for pentry in self.pentries:
-            entry = Entry(pentry, self.store)
-            if entry:
-                self.rentries.append(entry)
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, tag):
+        return tag in self.index
+
+    def __getitem__(self, tag):
+        try:
+            return self.values[tag]
+        except KeyError:
+            pass
+        entry = self.index[tag]
+        if self.store is None:
+            raise RPMError('tag %d is not available, the RPM was closed'
+                           % (tag, ))
+        if self.stats is None:
+            value = entry.decode(self.store)
+        else:
+            value = self.stats.decode(entry, self.store)
+        self.values[tag] = value
+        return value
+
+    def get(self, tag, default=None):
+        if tag in self.index:
+            return self[tag]
+        return default
 
 
 class RPMError(BaseException):
     pass
 
 
+def first(value, default=None):
+    ''' the first item of an array or list tag value, default when
+    there is none, other values are returned as is
+    '''
+    if isinstance(value, (array, list)):
+        return value[0] if len(value) else default
+    return default if value is None else value
+
+
 class RPM(object):
 
-    def __init__(self, rpm):
-        ''' rpm - StringIO.StringIO | file
+    LEAD_SIZE = 96
+
+    def __init__(self, rpm, strict=False, stats=None):
+        ''' rpm - StringIO.StringIO | file, see RPM.open to read
+            a file by path
+            strict - reject files where the headers are not where
+            the lead and the signature header say they are, or where
+            a header data store is truncated
+            stats - a pyrpm.stats.ParseStats the parse is counted in,
+            the package counters are then in self.stats
+
+            the lead and both headers are read strictly forward and the
+            payload is not touched, so rpm can be a pipe or a socket:
+            once parsed, the stream is positioned at payload_offset.
+            only a malformed file needs rpm to be seekable.
+
+            without strict a truncated data store is accepted, the tags
+            whose data is missing fail to decode, and payload_offset is
+            where the payload would start for the complete header, past
+            the bytes actually read.
         '''
-        if hasattr(rpm, 'read'):  # if it walk like a duck..
-            self.rpmfile = rpm
-        else:
+        if not hasattr(rpm, 'read'):  # if it walk like a duck..
             raise ValueError('invalid initialization: '
                              'StringIO or file expected received %s'
                              % (type(rpm), ))
+        self.__setup(rpm, strict, stats)
+
+        parser = self.__parse()
+        try:
+            size = next(parser)
+            while True:
+                size = parser.send(self.__read(size))
+        except StopIteration:
+            pass
+
+    @classmethod
+    async def from_stream(cls, reader, strict=False, stats=None):
+        ''' parses the headers from an asyncio.StreamReader with
+        awaited exact length reads, the payload is not read
+        '''
+        import asyncio
+
+        rpm = cls.__new__(cls)
+        rpm.__setup(reader, strict, stats)
+
+        parser = rpm.__parse()
+        try:
+            size = next(parser)
+            while True:
+                try:
+                    data = await reader.readexactly(size)
+                except asyncio.IncompleteReadError as error:
+                    data = error.partial
+                if rpm.stats is not None:
+                    rpm.stats.read(len(data))
+                size = parser.send(data)
+        except StopIteration:
+            pass
+        return rpm
+
+    def __setup(self, rpm, strict, stats):
+        self.rpmfile = rpm
+        self.strict = strict
+        self.stats = stats.package() if stats is not None else None
         self.binary = None
         self.source = None
-        self.__entries = dict()
+        self.signature = None
+        self.signature_offset = None
+        self.header_offset = None
+        self.payload_offset = None
         self.__headers = []
+        self.__mapping = None
+
+    def __parse(self):
+        ''' parses the lead and both headers
+
+            a generator yielding the number of bytes it needs next and
+            sent them back, so files and asyncio streams share it
+        '''
+        stats = self.stats
+        if stats is not None:
+            stats.enter('lead')
+        yield from self.__readlead()
+        if stats is not None:
+            stats.enter('signature')
+        offset = yield from self.__read_sigheader()
+        if stats is not None:
+            stats.enter('header')
+        yield from self.__readheaders(offset)
+        if stats is not None:
+            stats.finish()
+
+    def __read(self, size):
+        ''' read size bytes, pipes and sockets may return less than
+        asked for on a single read
+        '''
+        data = self.rpmfile.read(size)
+        if self.stats is not None:
+            self.stats.read(len(data))
+        if len(data) == size or not data:
+            return data
+        chunks = [data]
+        missing = size - len(data)
+        while missing:
+            data = self.rpmfile.read(missing)
+            if self.stats is not None:
+                self.stats.read(len(data))
+            if not data:
+                break
+            chunks.append(data)
+            missing -= len(data)
+        return b''.join(chunks)
 
-        self.__readlead()
-        offset = self.__read_sigheader()
-        self.__readheaders(offset)
+    def __seek(self, offset):
+        ''' seek used to search for misplaced headers
+        '''
+        seekable = getattr(self.rpmfile, 'seekable', None)
+        if not hasattr(self.rpmfile, 'seek') or \
+                (seekable is not None and not seekable()):
+            raise RPMError('invalid RPM file, header not found where '
+                           'expected and the stream is not seekable')
+        self.rpmfile.seek(offset)
+
+    def __search(self):
+        ''' find the next header magic number from the current position
+        '''
+        if self.stats is None:
+            return find_magic_number(self.rpmfile,
+                                     rpmdefs.RPM_HEADER_MAGIC_NUMBER)
+        previous = self.stats.enter('search')
+        start = self.rpmfile.tell()
+        offset = find_magic_number(self.rpmfile,
+                                   rpmdefs.RPM_HEADER_MAGIC_NUMBER)
+        self.stats.search(self.rpmfile.tell() - start)
+        self.stats.enter(previous)
+        return offset
+
+    @classmethod
+    def open(cls, path, strict=False, stats=None):
+        ''' memory maps the file at path, the headers data stores
+        are zero copy views of the mapping and values are decoded
+        straight from it. close releases the mapping.
+        '''
+        with io.open(path, 'rb') as rpmfile:
+            size = os.fstat(rpmfile.fileno()).st_size
+            if size:
+                mapping = mmap.mmap(rpmfile.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+            else:
+                mapping = None
+        reader = MemoryReader(mapping if mapping is not None else b'')
+        try:
+            rpm = cls(reader, strict=strict, stats=stats)
+        except BaseException:
+            reader.close()
+            if mapping is not None:
+                try:
+                    mapping.close()
+                except BufferError:
+                    # views of the mapping are still held by the partly
+                    # parsed headers in the traceback, the mapping is
+                    # closed when they are collected
+                    pass
+            raise
+        rpm.__mapping = mapping
+        return rpm
+
+    def close(self):
+        ''' release the memory mapping of a RPM built with RPM.open,
+        tags not decoded yet are no longer available afterwards
+        '''
+        if self.__mapping is None:
+            return
+        for header in [self.signature] + self.__headers:
+            if isinstance(header.store, memoryview):
+                header.store.release()
+            header.store = None
+        self.rpmfile.close()
+        self.__mapping.close()
+        self.__mapping = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def __readlead(self):
         ''' reads the rpm lead section
@@ -200,7 +530,9 @@ class RPM(object):
                } ;
         '''
         lead_fmt = '!4sBBhh66shh16s'
-        data = self.rpmfile.read(96)
+        data = yield self.LEAD_SIZE
+        if len(data) != self.LEAD_SIZE:
+            raise RPMError('invalid RPM file, lead is truncated')
         value = struct.unpack(lead_fmt, data)
 
         magic_num = value[0]
@@ -221,14 +553,27 @@ class RPM(object):
     def __read_sigheader(self):
         ''' read signature header
 
-            ATN: this will not return any usefull information
-            besides the file offset
+            the signature header follows the lead, its index count and
+            store size give the offset of the main header, which starts
+            at the next 8 bytes boundary.
+            returns the offset where the main header should start
         '''
-        start = find_magic_number(self.rpmfile, rpmdefs.RPM_HEADER_MAGIC_NUMBER)
-        if not start:
-            raise RPMError('invalid RPM file, signature header not found')
-        # return the offsite after the magic number
-        return start + len(rpmdefs.RPM_HEADER_MAGIC_NUMBER)
+        start = self.LEAD_SIZE
+        header = yield 16
+        if header[:3] != rpmdefs.RPM_HEADER_MAGIC_NUMBER:
+            if self.strict:
+                raise RPMError('invalid RPM file, signature header '
+                               'not found at offset %d' % (start, ))
+            self.__seek(start)
+            start = self.__search()
+            if start is None:
+                raise RPMError('invalid RPM file, signature header not found')
+            self.__seek(start)
+            header = yield 16
+        header = self.__readheader(header)
+        self.signature = yield from self.__readheaderdata(header)
+        self.signature_offset = start
+        return align(start + header_size(header[3], header[4]))
 
     def __readheader(self, header):
         ''' reads the header-header section
@@ -245,38 +590,108 @@ class RPM(object):
             raise RPMError('invalid RPM header')
         return header
 
+    def __readheaderdata(self, header):
+        ''' reads the index records and the data store that follow
+        the header-header section
+        '''
+        if header[3] > rpmdefs.RPM_HEADER_INDEX_MAX or \
+                header[4] > rpmdefs.RPM_HEADER_DATA_MAX or \
+                header[3] < 0 or header[4] < 0:
+            raise RPMError('invalid RPM header, header is too large')
+        entries = yield header[3] * 16
+        if len(entries) != header[3] * 16:
+            raise RPMError('invalid RPM header, index is truncated')
+        store = yield header[4]
+        if len(store) != header[4] and self.strict:
+            raise RPMError('invalid RPM header, data store is truncated')
+        if self.stats is None:
+            return Header(header, entries, store)
+        previous = self.stats.enter('index')
+        header = Header(header, entries, store, self.stats)
+        self.stats.tags += len(header)
+        self.stats.enter(previous)
+        return header
+
     def __readheaders(self, offset):
         ''' read information headers
+
+            offset is where the signature header says the main header
+            starts, when the magic number is not there the header is
+            searched for, unless strict is set
         '''
-        # lets find the start of the header
-        self.rpmfile.seek(offset)
-        start = find_magic_number(self.rpmfile, rpmdefs.RPM_HEADER_MAGIC_NUMBER)
-        # go back to the begining of the header
-        self.rpmfile.seek(start)
-        header = self.rpmfile.read(16)
+        end = self.signature_offset + header_size(*self.signature.header[3:])
+        # skip the signature header alignment padding
+        yield offset - end
+        header = yield 16
+        if header[:3] != rpmdefs.RPM_HEADER_MAGIC_NUMBER:
+            if self.strict:
+                raise RPMError('invalid RPM file, main header '
+                               'not found at offset %d' % (offset, ))
+            # magic like bytes in the signature data store are not
+            # a header
+            self.__seek(end)
+            offset = self.__search()
+            if offset is None:
+                raise RPMError('invalid RPM file, main header not found')
+            self.__seek(offset)
+            header = yield 16
         header = self.__readheader(header)
-        entries = []
-        for entry in range(header[3]):
-            _entry = self.rpmfile.read(16)
-            entries.append(_entry)
-        store = BytesIO(self.rpmfile.read(header[4]))
-        self.__headers.append(Header(header, entries, store))
+        self.header_offset = offset
+        self.payload_offset = offset + header_size(header[3], header[4])
+        header = yield from self.__readheaderdata(header)
+        self.__headers.append(header)
 
+    def __iter__(self):
         for header in self.__headers:
-            for entry in header.rentries:
-                self.__entries[entry.tag] = entry
+            for tag in header:
+                yield tag
 
-    def __iter__(self):
-        for entry in self.__entries:
-            yield entry
+    def __contains__(self, item):
+        return any(item in header for header in self.__headers)
 
     def __getitem__(self, item):
-        entry = self.__entries.get(item, None)
-        return entry.value if entry else None
+        for header in self.__headers:
+            if item in header:
+                return header[item]
+        return None
 
     def name(self):
         return self[rpmdefs.RPMTAG_NAME]
 
+    def payload(self):
+        ''' the package cpio archive, see pyrpm.payload.Payload
+
+            a seekable file is positioned at payload_offset, a stream
+            must not have been read past the headers
+        '''
+        from pyrpm.payload import Payload
+        seekable = getattr(self.rpmfile, 'seekable', None)
+        if hasattr(self.rpmfile, 'seek') and \
+                (seekable is None or seekable()):
+            self.rpmfile.seek(self.payload_offset)
+        return Payload(self.rpmfile, self[rpmdefs.RPMTAG_PAYLOADCOMPRESSOR])
+
+    def files(self):
+        ''' the package file list, see pyrpm.files.FileList
+        '''
+        from pyrpm.files import FileList
+        sizes = self[rpmdefs.RPMTAG_LONGFILESIZES]
+        if sizes is None:
+            sizes = self[rpmdefs.RPMTAG_FILESIZES]
+        modes = self[rpmdefs.RPMTAG_FILEMODES]
+        mtimes = self[rpmdefs.RPMTAG_FILEMTIMES]
+        basenames = self[rpmdefs.RPMTAG_BASENAMES]
+        if basenames is not None:
+            dirnames = self[rpmdefs.RPMTAG_DIRNAMES]
+            dirindexes = self[rpmdefs.RPMTAG_DIRINDEXES]
+            if dirnames is None or dirindexes is None:
+                raise RPMError('invalid RPM header, BASENAMES without '
+                               'DIRNAMES and DIRINDEXES')
+            return FileList(dirnames, dirindexes, basenames,
+                            sizes, modes, mtimes)
+        paths = self[rpmdefs.RPMTAG_OLDFILENAMES] or []
+        return FileList.from_paths(paths, sizes, modes, mtimes)
+
     def description(self):
         return self[rpmdefs.RPMTAG_DESCRIPTION]
 
@@ -9,6 +9,10 @@ rpm definitions
 RPM_LEAD_MAGIC_NUMBER = b'\xed\xab\xee\xdb'
 RPM_HEADER_MAGIC_NUMBER = b'\x8e\xad\xe8'
 
+# sanity limits on the header index count and data store size
+RPM_HEADER_INDEX_MAX = 0xffff
+RPM_HEADER_DATA_MAX = 0x0fffffff
+
 RPMTAG_MIN_NUMBER = 1000
 RPMTAG_MAX_NUMBER = 1146
 
@@ -20,6 +24,13 @@ RPMSIGTAG_LEMD5_2  = 1003
 RPMSIGTAG_MD5      = 1004
 RPMSIGTAG_GPG      = 1005
 RPMSIGTAG_PGP5     = 1006
+RPMSIGTAG_PAYLOADSIZE = 1007
+RPMSIGTAG_DSA      = 267
+RPMSIGTAG_RSA      = 268
+RPMSIGTAG_SHA1     = 269
+RPMSIGTAG_LONGSIZE = 270
+RPMSIGTAG_LONGARCHIVESIZE = 271
+RPMSIGTAG_SHA256   = 273
 
 
 MD5_SIZE = 16  # 16 bytes long
@@ -48,15 +59,170 @@ RPM_DATA_TYPES = (RPM_DATA_TYPE_NULL,
                   RPM_DATA_TYPE_BIN,
                   RPM_DATA_TYPE_STRING_ARRAY,)
 
+# dependency flags
+RPMSENSE_ANY = 0
+RPMSENSE_LESS = 1 << 1
+RPMSENSE_GREATER = 1 << 2
+RPMSENSE_EQUAL = 1 << 3
+RPMSENSE_PREREQ = 1 << 6
+RPMSENSE_INTERP = 1 << 8
+RPMSENSE_SCRIPT_PRE = 1 << 9
+RPMSENSE_SCRIPT_POST = 1 << 10
+RPMSENSE_SCRIPT_PREUN = 1 << 11
+RPMSENSE_SCRIPT_POSTUN = 1 << 12
+RPMSENSE_RPMLIB = 1 << 24
+
+# file flags
+RPMFILE_CONFIG = 1 << 0
+RPMFILE_DOC = 1 << 1
+RPMFILE_MISSINGOK = 1 << 3
+RPMFILE_NOREPLACE = 1 << 4
+RPMFILE_GHOST = 1 << 6
+RPMFILE_LICENSE = 1 << 7
+RPMFILE_README = 1 << 8
+
+# header private tags
+RPMTAG_HEADERIMAGE = 61
+RPMTAG_HEADERSIGNATURES = 62
+RPMTAG_HEADERIMMUTABLE = 63
+RPMTAG_HEADERREGIONS = 64
+RPMTAG_HEADERI18NTABLE = 100
+
 RPMTAG_NAME = 1000
 RPMTAG_VERSION = 1001
 RPMTAG_RELEASE = 1002
+RPMTAG_EPOCH = 1003
+RPMTAG_SUMMARY = 1004
 RPMTAG_DESCRIPTION = 1005
+RPMTAG_BUILDTIME = 1006
+RPMTAG_BUILDHOST = 1007
+RPMTAG_INSTALLTIME = 1008
+RPMTAG_SIZE = 1009
+RPMTAG_DISTRIBUTION = 1010
+RPMTAG_VENDOR = 1011
+RPMTAG_GIF = 1012
+RPMTAG_XPM = 1013
 RPMTAG_COPYRIGHT = 1014
+RPMTAG_LICENSE = 1014
+RPMTAG_PACKAGER = 1015
+RPMTAG_GROUP = 1016
+RPMTAG_CHANGELOG = 1017
+RPMTAG_SOURCE = 1018
+RPMTAG_PATCH = 1019
 RPMTAG_URL = 1020
+RPMTAG_OS = 1021
 RPMTAG_ARCH = 1022
+RPMTAG_PREIN = 1023
+RPMTAG_POSTIN = 1024
+RPMTAG_PREUN = 1025
+RPMTAG_POSTUN = 1026
+RPMTAG_OLDFILENAMES = 1027
+RPMTAG_FILESIZES = 1028
+RPMTAG_FILESTATES = 1029
+RPMTAG_FILEMODES = 1030
+RPMTAG_FILEUIDS = 1031
+RPMTAG_FILEGIDS = 1032
+RPMTAG_FILERDEVS = 1033
+RPMTAG_FILEMTIMES = 1034
+RPMTAG_FILEMD5S = 1035
+RPMTAG_FILELINKTOS = 1036
+RPMTAG_FILEFLAGS = 1037
+RPMTAG_ROOT = 1038
+RPMTAG_FILEUSERNAME = 1039
+RPMTAG_FILEGROUPNAME = 1040
+RPMTAG_EXCLUDE = 1041
+RPMTAG_EXCLUSIVE = 1042
+RPMTAG_ICON = 1043
+RPMTAG_SOURCERPM = 1044
+RPMTAG_FILEVERIFYFLAGS = 1045
+RPMTAG_ARCHIVESIZE = 1046
+RPMTAG_PROVIDENAME = 1047
+RPMTAG_REQUIREFLAGS = 1048
+RPMTAG_REQUIRENAME = 1049
+RPMTAG_REQUIREVERSION = 1050
+RPMTAG_NOSOURCE = 1051
+RPMTAG_NOPATCH = 1052
+RPMTAG_CONFLICTFLAGS = 1053
+RPMTAG_CONFLICTNAME = 1054
+RPMTAG_CONFLICTVERSION = 1055
+RPMTAG_DEFAULTPREFIX = 1056
+RPMTAG_BUILDROOT = 1057
+RPMTAG_INSTALLPREFIX = 1058
+RPMTAG_EXCLUDEARCH = 1059
+RPMTAG_EXCLUDEOS = 1060
+RPMTAG_EXCLUSIVEARCH = 1061
+RPMTAG_EXCLUSIVEOS = 1062
+RPMTAG_AUTOREQPROV = 1063
+RPMTAG_RPMVERSION = 1064
+RPMTAG_TRIGGERSCRIPTS = 1065
+RPMTAG_TRIGGERNAME = 1066
+RPMTAG_TRIGGERVERSION = 1067
+RPMTAG_TRIGGERFLAGS = 1068
+RPMTAG_TRIGGERINDEX = 1069
+RPMTAG_VERIFYSCRIPT = 1079
+RPMTAG_CHANGELOGTIME = 1080
+RPMTAG_CHANGELOGNAME = 1081
+RPMTAG_CHANGELOGTEXT = 1082
+RPMTAG_PREINPROG = 1085
+RPMTAG_POSTINPROG = 1086
+RPMTAG_PREUNPROG = 1087
+RPMTAG_POSTUNPROG = 1088
+RPMTAG_BUILDARCHS = 1089
+RPMTAG_OBSOLETENAME = 1090
+RPMTAG_VERIFYSCRIPTPROG = 1091
+RPMTAG_TRIGGERSCRIPTPROG = 1092
+RPMTAG_COOKIE = 1094
+RPMTAG_FILEDEVICES = 1095
+RPMTAG_FILEINODES = 1096
+RPMTAG_FILELANGS = 1097
+RPMTAG_PREFIXES = 1098
+RPMTAG_INSTPREFIXES = 1099
+RPMTAG_PROVIDEFLAGS = 1112
+RPMTAG_PROVIDEVERSION = 1113
+RPMTAG_OBSOLETEFLAGS = 1114
+RPMTAG_OBSOLETEVERSION = 1115
+RPMTAG_DIRINDEXES = 1116
+RPMTAG_BASENAMES = 1117
+RPMTAG_DIRNAMES = 1118
+RPMTAG_OPTFLAGS = 1122
+RPMTAG_DISTURL = 1123
+RPMTAG_PAYLOADFORMAT = 1124
+RPMTAG_PAYLOADCOMPRESSOR = 1125
+RPMTAG_PAYLOADFLAGS = 1126
+RPMTAG_INSTALLCOLOR = 1127
+RPMTAG_INSTALLTID = 1128
+RPMTAG_REMOVETID = 1129
+RPMTAG_RHNPLATFORM = 1131
+RPMTAG_PLATFORM = 1132
+RPMTAG_PATCHESNAME = 1133
+RPMTAG_PATCHESFLAGS = 1134
+RPMTAG_PATCHESVERSION = 1135
+RPMTAG_CACHECTIME = 1136
+RPMTAG_CACHEPKGPATH = 1137
+RPMTAG_CACHEPKGSIZE = 1138
+RPMTAG_CACHEPKGMTIME = 1139
+RPMTAG_FILECOLORS = 1140
+RPMTAG_FILECLASS = 1141
+RPMTAG_CLASSDICT = 1142
+RPMTAG_FILEDEPENDSX = 1143
+RPMTAG_FILEDEPENDSN = 1144
+RPMTAG_DEPENDSDICT = 1145
+RPMTAG_SOURCEPKGID = 1146
+RPMTAG_LONGFILESIZES = 5008
+RPMTAG_LONGSIZE = 5009
+RPMTAG_PAYLOADDIGEST = 5092
+RPMTAG_PAYLOADDIGESTALGO = 5093
+
+# digest algorithms (PGPHASHALGO_*) used by the digest tags
+PGPHASHALGO_MD5 = 1
+PGPHASHALGO_SHA1 = 2
+PGPHASHALGO_SHA256 = 8
+PGPHASHALGO_SHA384 = 9
+PGPHASHALGO_SHA512 = 10
 
 
+# tags most callers are interested in, every other tag in the header
+# is still available through RPM.__getitem__
 RPMTAGS = (RPMTAG_NAME,
            RPMTAG_VERSION,
            RPMTAG_RELEASE,
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+bulk scanner
+
+parses the headers of many RPM files in a process pool and streams
+the selected fields back, one dict per package.
+
+'''
+
+import argparse
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import sys
+from array import array
+
+from pyrpm import rpmdefs
+from pyrpm.cache import MetadataCache, file_identity, read_tags
+from pyrpm.rpm import RPM, RPMError
+from pyrpm.stats import ParseStats
+
+
+# field name -> tag, built from the rpmdefs RPMTAG_* names, without the
+# constants that are not tags
+FIELDS = dict((name[len('RPMTAG_'):].lower(), getattr(rpmdefs, name))
+              for name in dir(rpmdefs) if name.startswith('RPMTAG_') and
+              name not in ('RPMTAG_MIN_NUMBER', 'RPMTAG_MAX_NUMBER'))
+DEFAULT_FIELDS = ('name', 'version', 'release', 'arch', )
+
+# tags the filename field is built from with a cache, a package
+# without SOURCERPM is a source package
+FILENAME_TAGS = (rpmdefs.RPMTAG_NAME, rpmdefs.RPMTAG_VERSION,
+                 rpmdefs.RPMTAG_RELEASE, rpmdefs.RPMTAG_ARCH,
+                 rpmdefs.RPMTAG_SOURCERPM, )
+
+
+def find_packages(paths):
+    ''' yields the RPM files found in paths, directories are walked
+    recursively, files are yielded as given
+    '''
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith('.rpm'):
+                    yield os.path.join(root, name)
+
+
+def export(value):
+    ''' turns a decoded tag value into something json can encode
+    '''
+    if isinstance(value, array):
+        return value.tolist()
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def read_package(path, fields=DEFAULT_FIELDS, stats=False):
+    ''' parses the headers of the package at path, returns a dict with
+    the path and the fields, or the path and the error
+
+    with stats the parse counters (see pyrpm.stats) are in 'stats'
+    '''
+    record = {'path': path}
+    parse_stats = ParseStats() if stats else None
+    try:
+        with RPM.open(path, stats=parse_stats) as rpm:
+            for field in fields:
+                if field == 'filename':
+                    record[field] = rpm.filename()
+                else:
+                    record[field] = export(rpm[FIELDS[field]])
+    except (RPMError, Exception) as error:
+        return {'path': path, 'error': '%s' % (error, )}
+    if parse_stats is not None:
+        record['stats'] = parse_stats.as_dict()
+    return record
+
+
+def cached_filename(values):
+    ''' RPM.filename from the cached FILENAME_TAGS values
+    '''
+    source = rpmdefs.RPMTAG_SOURCERPM not in values
+    return '%s-%s-%s.%s.%s' % (
+        values.get(rpmdefs.RPMTAG_NAME), values.get(rpmdefs.RPMTAG_VERSION),
+        values.get(rpmdefs.RPMTAG_RELEASE), values.get(rpmdefs.RPMTAG_ARCH),
+        'src.rpm' if source else 'rpm')
+
+
+def read_cached_tags(path, tags):
+    ''' parses the tags of the package at path for the cache,
+    returns a dict with the path and the tags, or the path and the error
+    '''
+    try:
+        return {'path': path, 'tags': read_tags(path, tags)}
+    except (RPMError, Exception) as error:
+        return {'path': path, 'error': '%s' % (error, )}
+
+
+def scan(paths, fields=DEFAULT_FIELDS, workers=None, chunksize=64,
+         ordered=True, cache=None, stats=None):
+    ''' scans the RPM files in paths, directories are walked
+
+        fields - tag names (see FIELDS) and/or 'filename'
+        workers - number of processes, defaults to the cpu count,
+        1 parses in the current process
+        chunksize - number of packages handed to a worker at once
+        ordered - yield results in the order of the files found,
+        otherwise as soon as they are parsed
+        cache - a MetadataCache, unchanged packages are not parsed
+        again, fields must then be tags stored by the cache (filename
+        needs the FILENAME_TAGS)
+        stats - a pyrpm.stats.ParseStats the counters of the packages
+        parsed (in the workers) are merged into, not with a cache
+
+        yields a dict per package, a package that can not be parsed
+        yields its path and an 'error' message instead of the fields
+    '''
+    fields = tuple(fields)
+    for field in fields:
+        if field != 'filename' and field not in FIELDS:
+            raise ValueError('unknown field %r' % (field, ))
+    if cache is not None:
+        if stats is not None:
+            raise ValueError('stats are not collected with a cache')
+        for field in fields:
+            tags = FILENAME_TAGS if field == 'filename' else (FIELDS[field], )
+            if not set(tags).issubset(cache.tags):
+                raise ValueError('field %r is not cached' % (field, ))
+        return _scan_cached(cache, fields, find_packages(paths), workers,
+                            chunksize, ordered)
+    read = functools.partial(read_package, fields=fields,
+                             stats=stats is not None)
+    records = parallel_map(read, find_packages(paths), workers, chunksize,
+                           ordered)
+    if stats is None:
+        return records
+    return _merge_stats(records, stats)
+
+
+def _merge_stats(records, stats):
+    for record in records:
+        values = record.pop('stats', None)
+        if values is not None:
+            stats.merge(values)
+        yield record
+
+
+def parallel_map(function, items, workers=None, chunksize=64, ordered=True):
+    ''' yields function(item) for items, computed in a pool of workers
+    processes (in the current process when workers is 1), in the order
+    of items or as soon as they are ready
+    '''
+    if workers == 1:
+        for result in map(function, items):
+            yield result
+        return
+    pool = multiprocessing.Pool(workers)
+    try:
+        if ordered:
+            results = pool.imap(function, items, chunksize)
+        else:
+            results = pool.imap_unordered(function, items, chunksize)
+        for result in results:
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _scan_cached(cache, fields, packages, workers, chunksize, ordered):
+    def record(path, values):
+        record = {'path': path}
+        for field in fields:
+            if field == 'filename':
+                record[field] = cached_filename(values)
+            else:
+                record[field] = export(values.get(FIELDS[field]))
+        return record
+
+    # cache hits are answered here, only misses go to the workers
+    records = []
+    misses = []
+    identities = dict()
+    for path in packages:
+        try:
+            identity = file_identity(path)
+        except EnvironmentError as error:
+            records.append({'path': path, 'error': '%s' % (error, )})
+            continue
+        values = cache.lookup(path, identity)
+        if values is None:
+            misses.append(path)
+            identities[path] = identity
+            records.append(None)
+        else:
+            records.append(record(path, values))
+
+    read = functools.partial(read_cached_tags, tags=cache.tags)
+    results = parallel_map(read, misses, workers, chunksize, ordered)
+
+    def parsed(result):
+        if 'error' in result:
+            return result
+        cache.store(result['path'], identities[result['path']],
+                    result['tags'])
+        return record(result['path'], result['tags'])
+
+    if ordered:
+        for value in records:
+            yield parsed(next(results)) if value is None else value
+    else:
+        for value in records:
+            if value is not None:
+                yield value
+        for result in results:
+            yield parsed(result)
+
+
+def write_jsonl(records, output):
+    ''' writes records as JSON lines, returns the number of errors
+    '''
+    errors = 0
+    for record in records:
+        errors += 'error' in record
+        output.write(json.dumps(record, sort_keys=True))
+        output.write('\n')
+    return errors
+
+
+def write_csv(records, output, fields=DEFAULT_FIELDS):
+    ''' writes records as CSV, lists are written as JSON,
+    returns the number of errors
+    '''
+    errors = 0
+    writer = csv.writer(output)
+    writer.writerow(('path', ) + tuple(fields) + ('error', ))
+    for record in records:
+        errors += 'error' in record
+        row = [record['path']]
+        for field in fields:
+            value = record.get(field)
+            if isinstance(value, list):
+                value = json.dumps(value)
+            row.append(value)
+        row.append(record.get('error'))
+        writer.writerow(row)
+    return errors
+
+
+def main(argv=None):
+    ''' pyrpm-scan command line entry point
+    '''
+    parser = argparse.ArgumentParser(
+        prog='pyrpm-scan',
+        description='extract header fields from RPM files and directories')
+    parser.add_argument('paths', nargs='+', metavar='PATH')
+    parser.add_argument('-f', '--fields', default=','.join(DEFAULT_FIELDS),
+                        help='comma separated tag names '
+                             '(default: %(default)s)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of worker processes '
+                             '(default: number of cpus)')
+    parser.add_argument('--chunksize', type=int, default=64,
+                        help='packages per worker task (default: %(default)s)')
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--unordered', action='store_true',
+                        help='output packages as soon as they are parsed')
+    parser.add_argument('--cache', metavar='DB',
+                        help='SQLite metadata cache, unchanged packages '
+                             'are not parsed again')
+    parser.add_argument('--cache-size', type=int, default=None,
+                        help='number of packages kept in the cache')
+    parser.add_argument('--stats', action='store_true',
+                        help='report where parsing spent its time '
+                             '(on stderr)')
+    args = parser.parse_args(argv)
+
+    fields = tuple(field.strip() for field in args.fields.split(',')
+                   if field.strip())
+    cache = None
+    if args.cache:
+        tags = set(rpmdefs.RPMTAGS)
+        tags.update(FIELDS[field] for field in fields if field in FIELDS)
+        if 'filename' in fields:
+            tags.update(FILENAME_TAGS)
+        cache = MetadataCache(args.cache, tags=sorted(tags),
+                              max_entries=args.cache_size)
+    stats = ParseStats() if args.stats else None
+    try:
+        records = scan(args.paths, fields=fields, workers=args.workers,
+                       chunksize=args.chunksize, ordered=not args.unordered,
+                       cache=cache, stats=stats)
+    except ValueError as error:
+        parser.error('%s' % (error, ))
+    if args.format == 'csv':
+        errors = write_csv(records, sys.stdout, fields)
+    else:
+        errors = write_jsonl(records, sys.stdout)
+    if cache is not None:
+        sys.stderr.write('cache: %d hits, %d misses\n'
+                         % (cache.hits, cache.misses, ))
+        cache.close()
+    if stats is not None:
+        sys.stderr.write(stats.format_report())
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+parse instrumentation
+
+opt-in counters of where header parsing spends its time: pass a
+ParseStats to RPM (RPM.open, RPM.from_stream, scan...) and every package
+parsed with it is timed by stage, with the bytes and read calls it took
+and the tags it indexed and decoded. without one the parser only pays an
+`is None` test per stage.
+
+    >>> stats = ParseStats(hook=lambda package: send(package.as_dict()))
+    >>> for path in paths:
+    ...     with RPM.open(path, stats=stats) as rpm:
+    ...         rpm.filename()
+    >>> print(stats.format_report())
+
+stages (exclusive, wall clock time, so it includes the waits of a
+stream or of other asyncio tasks):
+    lead - reading the lead
+    signature - reading the signature header
+    header - reading the main header
+    search - looking for misplaced headers (find_magic_number)
+    index - building the tag index of the headers
+    decode - decoding tag values, after parsing as they are asked for
+
+'''
+
+from time import perf_counter
+
+STAGES = ('lead', 'signature', 'header', 'search', 'index', 'decode', )
+
+COUNTERS = ('bytes_read', 'read_calls', 'searches', 'tags', 'tags_decoded', )
+
+
+class PackageStats(object):
+    ''' counters of one package, RPM.stats when parsed with a ParseStats
+    '''
+    __slots__ = ('parent', 'times', 'stage', 'mark', ) + COUNTERS
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.times = dict.fromkeys(STAGES, 0.0)
+        self.stage = None
+        self.mark = None
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    def enter(self, stage):
+        ''' charges the time since the last call to the current stage
+        and switches to stage, returns the previous stage
+        '''
+        now = perf_counter()
+        if self.stage is not None:
+            self.times[self.stage] += now - self.mark
+        self.mark = now
+        previous, self.stage = self.stage, stage
+        return previous
+
+    def read(self, size):
+        ''' counts a read of size bytes
+        '''
+        self.bytes_read += size
+        self.read_calls += 1
+
+    def search(self, size):
+        ''' counts a header search that scanned size bytes
+        '''
+        self.bytes_read += size
+        self.searches += 1
+
+    def decode(self, entry, store):
+        ''' decodes entry, timed
+        '''
+        start = perf_counter()
+        value = entry.decode(store)
+        seconds = perf_counter() - start
+        self.times['decode'] += seconds
+        self.tags_decoded += 1
+        # the package was already added to its parent when parsed
+        if self.parent is not None:
+            self.parent.times['decode'] += seconds
+            self.parent.tags_decoded += 1
+        return value
+
+    def finish(self):
+        ''' ends the parse, adds the package to its parent
+        '''
+        self.enter(None)
+        if self.parent is not None:
+            self.parent.add(self)
+
+    def as_dict(self):
+        values = dict((counter, getattr(self, counter))
+                      for counter in COUNTERS)
+        values['times'] = dict(self.times)
+        return values
+
+
+class ParseStats(object):
+    ''' aggregated counters of the packages parsed with it
+
+        hook - called with the PackageStats of every package once its
+        headers are parsed (values decoded later are not in it yet)
+
+    one ParseStats can be shared by many RPM objects, concurrent asyncio
+    parses included, but not between threads
+    '''
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.packages = 0
+        self.times = dict.fromkeys(STAGES, 0.0)
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    def package(self):
+        ''' a PackageStats adding up to this one
+        '''
+        return PackageStats(self)
+
+    def add(self, package):
+        self.merge(package.as_dict())
+        if self.hook is not None:
+            self.hook(package)
+
+    def merge(self, values):
+        ''' adds the counters of a PackageStats or ParseStats as_dict,
+        e.g. sent back by a worker process
+        '''
+        self.packages += values.get('packages', 1)
+        for counter in COUNTERS:
+            setattr(self, counter, getattr(self, counter) + values[counter])
+        for stage, seconds in values['times'].items():
+            self.times[stage] += seconds
+
+    def as_dict(self):
+        values = dict((counter, getattr(self, counter))
+                      for counter in COUNTERS)
+        values['packages'] = self.packages
+        values['times'] = dict(self.times)
+        return values
+
+    def report(self):
+        ''' the totals and per package means
+        '''
+        packages = self.packages or 1
+        report = self.as_dict()
+        report['total_time'] = sum(self.times.values())
+        report['mean'] = dict((counter, getattr(self, counter) / packages)
+                              for counter in COUNTERS)
+        report['mean']['times'] = dict(
+            (stage, seconds / packages) for stage, seconds
+            in self.times.items())
+        return report
+
+    def format_report(self):
+        ''' the report as a text table
+        '''
+        report = self.report()
+        total = report['total_time'] or 1
+        lines = ['%d packages, %d bytes in %d reads, %d searches, '
+                 '%d tags indexed, %d decoded'
+                 % (self.packages, self.bytes_read, self.read_calls,
+                    self.searches, self.tags, self.tags_decoded),
+                 '%-10s %12s %14s %7s' % ('stage', 'total ms',
+                                          'per package us', '%')]
+        for stage in STAGES:
+            seconds = self.times[stage]
+            lines.append('%-10s %12.3f %14.3f %6.1f%%'
+                         % (stage, seconds * 1e3,
+                            report['mean']['times'][stage] * 1e6,
+                            seconds * 100 / total))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+package verification
+
+checks the sizes and digests recorded in the signature header (and the
+main header payload digest) against the package contents. the headers
+are parsed and then the main header and the payload are hashed in a
+single pass of large reads into a reused buffer.
+
+    >>> verify('package-1.0-r1.i586.rpm')
+    {'size': True, 'md5': True, 'sha1': True}
+
+hashlib releases the GIL while hashing, verify_many checks packages
+concurrently in a thread pool.
+
+'''
+
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from pyrpm import rpmdefs
+from pyrpm.rpm import RPM, RPMError, first
+
+CHUNK_SIZE = 1024 * 1024
+
+HASH_ALGORITHMS = {rpmdefs.PGPHASHALGO_MD5: 'md5',
+                   rpmdefs.PGPHASHALGO_SHA1: 'sha1',
+                   rpmdefs.PGPHASHALGO_SHA256: 'sha256',
+                   rpmdefs.PGPHASHALGO_SHA384: 'sha384',
+                   rpmdefs.PGPHASHALGO_SHA512: 'sha512'}
+
+
+def verify_file(rpmfile, chunk_size=CHUNK_SIZE):
+    ''' verifies the package in the seekable file rpmfile
+
+        returns a check -> bool dict, with only the checks the package
+        has digests for:
+        size - main header and payload size (SIZE/LONGSIZE)
+        md5 - main header and payload MD5
+        sha1, sha256 - main header digests
+        payloaddigest - compressed payload digest from the main header
+    '''
+    rpm = RPM(rpmfile)
+    signature = rpm.signature
+
+    expected = dict()
+    size = first(signature.get(rpmdefs.RPMSIGTAG_LONGSIZE) or
+                 signature.get(rpmdefs.RPMSIGTAG_SIZE))
+    header_hashes = dict()
+    all_hashes = dict()
+    payload_hashes = dict()
+    if rpmdefs.RPMSIGTAG_MD5 in signature:
+        expected['md5'] = signature[rpmdefs.RPMSIGTAG_MD5].hex()
+        all_hashes['md5'] = hashlib.md5()
+    if rpmdefs.RPMSIGTAG_SHA1 in signature:
+        expected['sha1'] = signature[rpmdefs.RPMSIGTAG_SHA1].lower()
+        header_hashes['sha1'] = hashlib.sha1()
+    if rpmdefs.RPMSIGTAG_SHA256 in signature:
+        expected['sha256'] = signature[rpmdefs.RPMSIGTAG_SHA256].lower()
+        header_hashes['sha256'] = hashlib.sha256()
+    payloaddigest = first(rpm[rpmdefs.RPMTAG_PAYLOADDIGEST])
+    if payloaddigest is not None:
+        algorithm = first(rpm[rpmdefs.RPMTAG_PAYLOADDIGESTALGO])
+        algorithm = HASH_ALGORITHMS.get(
+            rpmdefs.PGPHASHALGO_SHA256 if algorithm is None else algorithm)
+        if algorithm is None:
+            raise RPMError('unknown payload digest algorithm')
+        expected['payloaddigest'] = payloaddigest.lower()
+        payload_hashes['payloaddigest'] = hashlib.new(algorithm)
+
+    # one pass over the main header and the payload
+    header_left = rpm.payload_offset - rpm.header_offset
+    total = 0
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    rpmfile.seek(rpm.header_offset)
+    while True:
+        count = rpmfile.readinto(buffer)
+        if not count:
+            break
+        chunk = view[:count]
+        total += count
+        for digest in all_hashes.values():
+            digest.update(chunk)
+        if header_left:
+            header = chunk[:header_left]
+            for digest in header_hashes.values():
+                digest.update(header)
+            chunk = chunk[len(header):]
+            header_left -= len(header)
+        if len(chunk):
+            for digest in payload_hashes.values():
+                digest.update(chunk)
+    view.release()
+
+    results = dict()
+    if size is not None:
+        results['size'] = total == size
+    for hashes in (all_hashes, header_hashes, payload_hashes):
+        for name, digest in hashes.items():
+            results[name] = digest.hexdigest() == expected[name]
+    if header_left:
+        # a truncated header can not match any header digest
+        for name in header_hashes:
+            results[name] = False
+    return results
+
+
+def verify(path, chunk_size=CHUNK_SIZE):
+    ''' verifies the package at path, see verify_file
+    '''
+    with io.open(path, 'rb') as rpmfile:
+        return verify_file(rpmfile, chunk_size)
+
+
+def verify_many(paths, workers=None, chunk_size=CHUNK_SIZE):
+    ''' verifies packages concurrently in a thread pool, yields
+    (path, results, error) tuples in the order of paths, results is
+    None when the package could not be read and error tells why
+    '''
+    def check(path):
+        try:
+            return path, verify(path, chunk_size), None
+        except (RPMError, Exception) as error:
+            return path, None, '%s' % (error, )
+
+    with ThreadPoolExecutor(workers) as executor:
+        for result in executor.map(check, paths):
+            yield result
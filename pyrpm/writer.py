@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+rpm writer
+
+builds RPM files from tag values: the lead, a signature header (size
+and MD5 of the main header and payload), the main header and an opaque
+payload. meant for test fixtures and benchmarks, not for building real
+packages (no header region, no signing).
+
+    >>> data = build_rpm([(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING,
+    ...                    'package')])
+    >>> RPM(BytesIO(data)).name()
+    'package'
+
+synthetic_package builds packages of a chosen shape (file count, string
+sizes, payload size) from a seed, the same arguments always give the same
+bytes.
+
+'''
+
+import hashlib
+import random
+import struct
+
+from pyrpm import rpmdefs
+from pyrpm.rpm import align
+
+INT_FORMATS = {rpmdefs.RPM_DATA_TYPE_INT8: 'B',
+               rpmdefs.RPM_DATA_TYPE_INT16: 'H',
+               rpmdefs.RPM_DATA_TYPE_INT32: 'I',
+               rpmdefs.RPM_DATA_TYPE_INT64: 'Q'}
+
+STRING_TYPES = (rpmdefs.RPM_DATA_TYPE_STRING,
+                rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+                rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE)
+
+
+def encode(type, value):
+    ''' returns the (count, data) of a tag value
+
+        int types - an int or a sequence of ints
+        string types - a str or a sequence of str
+        char, bin - bytes
+    '''
+    if type in INT_FORMATS:
+        if isinstance(value, int):
+            value = [value]
+        return len(value), struct.pack('!%d%s' % (len(value),
+                                                  INT_FORMATS[type]), *value)
+    if type in STRING_TYPES:
+        if isinstance(value, str):
+            value = [value]
+        if type == rpmdefs.RPM_DATA_TYPE_STRING and len(value) != 1:
+            raise ValueError('a string entry holds one string')
+        return len(value), b''.join(string.encode('utf-8') + b'\x00'
+                                    for string in value)
+    if type in (rpmdefs.RPM_DATA_TYPE_CHAR, rpmdefs.RPM_DATA_TYPE_BIN):
+        return len(value), bytes(value)
+    if type == rpmdefs.RPM_DATA_TYPE_NULL:
+        return 0, b''
+    raise ValueError('unknown data type %r' % (type, ))
+
+
+def header_bytes(entries):
+    ''' builds a header structure from (tag, type, value) tuples,
+    sorted by tag like rpm does, integer values are aligned to their
+    size in the store
+    '''
+    index = []
+    store = bytearray()
+    for tag, type, value in sorted(entries, key=lambda entry: entry[0]):
+        count, data = encode(type, value)
+        if type in INT_FORMATS:
+            store += b'\x00' * (-len(store) % struct.calcsize(
+                INT_FORMATS[type]))
+        index.append(struct.pack('!llll', tag, type, len(store), count))
+        store += data
+    header = struct.pack('!3sc4sll', rpmdefs.RPM_HEADER_MAGIC_NUMBER,
+                         b'\x01', b'\x00' * 4, len(index), len(store))
+    return header + b''.join(index) + bytes(store)
+
+
+def lead_bytes(name, source=False):
+    ''' builds the lead of a package named name
+    '''
+    return struct.pack('!4sBBhh66shh16s', rpmdefs.RPM_LEAD_MAGIC_NUMBER, 3, 0,
+                       1 if source else 0, 1, name.encode('utf-8')[:65],
+                       1, 5, b'')
+
+
+def build_rpm(entries, payload=b'', signature=None, source=False):
+    ''' builds a RPM file from the (tag, type, value) entries of the
+    main header and the payload bytes
+
+    the signature header holds signature entries, or by default the
+    size and MD5 of the main header and payload
+    '''
+    header = header_bytes(entries)
+    if signature is None:
+        signature = [
+            (rpmdefs.RPMSIGTAG_SIZE, rpmdefs.RPM_DATA_TYPE_INT32,
+             len(header) + len(payload)),
+            (rpmdefs.RPMSIGTAG_MD5, rpmdefs.RPM_DATA_TYPE_BIN,
+             hashlib.md5(header + payload).digest()),
+        ]
+    name = ''
+    for tag, type, value in entries:
+        if tag == rpmdefs.RPMTAG_NAME:
+            name = value
+    data = lead_bytes(name, source) + header_bytes(signature)
+    data += b'\x00' * (align(len(data)) - len(data))
+    return data + header + payload
+
+
+def synthetic_package(name='synthetic', files=10, string_size=32,
+                      payload_size=0, dependencies=10, changelogs=0, seed=0):
+    ''' builds a package of a given shape, deterministic for a seed
+
+        files - number of files, spread over files // 10 + 1 directories
+        string_size - length of the summary, description and other
+        free text strings
+        payload_size - size of the (opaque) payload
+        dependencies - number of Provides and of Requires
+        changelogs - number of changelog entries
+    '''
+    generator = random.Random(seed)
+
+    def text(size):
+        words = []
+        length = 0
+        while length < size:
+            word = ''.join(generator.choice('abcdefghijklmnopqrstuvwxyz')
+                           for _ in range(generator.randint(2, 10)))
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words)[:size]
+
+    directories = ['/usr/share/%s/%d/' % (name, number)
+                   for number in range(files // 10 + 1)]
+    entries = [
+        (rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, name),
+        (rpmdefs.RPMTAG_VERSION, rpmdefs.RPM_DATA_TYPE_STRING, '1.0'),
+        (rpmdefs.RPMTAG_RELEASE, rpmdefs.RPM_DATA_TYPE_STRING, '1'),
+        (rpmdefs.RPMTAG_SUMMARY, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE,
+         text(string_size)),
+        (rpmdefs.RPMTAG_DESCRIPTION, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE,
+         text(string_size * 8)),
+        (rpmdefs.RPMTAG_BUILDTIME, rpmdefs.RPM_DATA_TYPE_INT32, 1157550008),
+        (rpmdefs.RPMTAG_BUILDHOST, rpmdefs.RPM_DATA_TYPE_STRING,
+         'build.example.com'),
+        (rpmdefs.RPMTAG_SIZE, rpmdefs.RPM_DATA_TYPE_INT32,
+         files * 1024),
+        (rpmdefs.RPMTAG_LICENSE, rpmdefs.RPM_DATA_TYPE_STRING, 'GPL'),
+        (rpmdefs.RPMTAG_GROUP, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE,
+         'Development/Libraries'),
+        (rpmdefs.RPMTAG_URL, rpmdefs.RPM_DATA_TYPE_STRING,
+         'https://example.com/' + name),
+        (rpmdefs.RPMTAG_OS, rpmdefs.RPM_DATA_TYPE_STRING, 'linux'),
+        (rpmdefs.RPMTAG_ARCH, rpmdefs.RPM_DATA_TYPE_STRING, 'x86_64'),
+        (rpmdefs.RPMTAG_SOURCERPM, rpmdefs.RPM_DATA_TYPE_STRING,
+         '%s-1.0-1.src.rpm' % (name, )),
+    ]
+    if files:
+        entries += [
+            (rpmdefs.RPMTAG_FILESIZES, rpmdefs.RPM_DATA_TYPE_INT32,
+             [generator.randint(0, 65536) for _ in range(files)]),
+            (rpmdefs.RPMTAG_FILEMODES, rpmdefs.RPM_DATA_TYPE_INT16,
+             [0o100644] * files),
+            (rpmdefs.RPMTAG_FILEMTIMES, rpmdefs.RPM_DATA_TYPE_INT32,
+             [1157550008] * files),
+            (rpmdefs.RPMTAG_FILEMD5S, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             ['%064x' % (generator.getrandbits(256), )
+              for _ in range(files)]),
+            (rpmdefs.RPMTAG_FILEFLAGS, rpmdefs.RPM_DATA_TYPE_INT32,
+             [0] * files),
+            (rpmdefs.RPMTAG_DIRINDEXES, rpmdefs.RPM_DATA_TYPE_INT32,
+             [number // 10 for number in range(files)]),
+            (rpmdefs.RPMTAG_BASENAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             ['file-%d-%s' % (number, text(8).replace(' ', '-'))
+              for number in range(files)]),
+            (rpmdefs.RPMTAG_DIRNAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             directories),
+        ]
+    if dependencies:
+        names = ['lib%s.so.%d' % (text(8).replace(' ', ''), number)
+                 for number in range(dependencies)]
+        entries += [
+            (rpmdefs.RPMTAG_PROVIDENAME, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             [name] + names[1:]),
+            (rpmdefs.RPMTAG_REQUIREFLAGS, rpmdefs.RPM_DATA_TYPE_INT32,
+             [rpmdefs.RPMSENSE_GREATER | rpmdefs.RPMSENSE_EQUAL] *
+             dependencies),
+            (rpmdefs.RPMTAG_REQUIRENAME, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             ['req-' + provide for provide in names]),
+            (rpmdefs.RPMTAG_REQUIREVERSION,
+             rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, ['1.0'] * dependencies),
+            (rpmdefs.RPMTAG_PROVIDEFLAGS, rpmdefs.RPM_DATA_TYPE_INT32,
+             [rpmdefs.RPMSENSE_EQUAL] * dependencies),
+            (rpmdefs.RPMTAG_PROVIDEVERSION,
+             rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, ['1.0-1'] * dependencies),
+        ]
+    if changelogs:
+        entries += [
+            (rpmdefs.RPMTAG_CHANGELOGTIME, rpmdefs.RPM_DATA_TYPE_INT32,
+             [1157550008 - 86400 * number for number in range(changelogs)]),
+            (rpmdefs.RPMTAG_CHANGELOGNAME, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             ['packager <packager@example.com> 1.0-%d' % (number, )
+              for number in range(changelogs)]),
+            (rpmdefs.RPMTAG_CHANGELOGTEXT, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             ['- ' + text(string_size) for _ in range(changelogs)]),
+        ]
+    entries.append((rpmdefs.RPMTAG_PAYLOADCOMPRESSOR,
+                    rpmdefs.RPM_DATA_TYPE_STRING, 'identity'))
+    payload = generator.getrandbits(payload_size * 8).to_bytes(
+        payload_size, 'big') if payload_size else b''
+    return build_rpm(entries, payload)
@@ -19,6 +19,8 @@ setup(name='pyrpm',
       install_requires=['setuptools',
                         ],
       entry_points="""
-      # Add entry points here
+      [console_scripts]
+      pyrpm-scan = pyrpm.scanner:main
+      pyrpm-repodata = pyrpm.repodata:main
       """,
       )
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+asyncio API tests
+
+'''
+
+import asyncio
+import unittest
+
+from pyrpm import RPM
+from pyrpm.aio import parse_many
+from pyrpm.rpm import RPMError
+
+from test_rpm import rpm_file
+
+
+def make_reader(data, payload=b''):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data + payload)
+    reader.feed_eof()
+    return reader
+
+
+class AsyncTest(unittest.TestCase):
+
+    def test_from_stream(self):
+        async def parse():
+            reader = make_reader(rpm_file)
+            rpm = await RPM.from_stream(reader)
+            return rpm, await reader.read()
+
+        rpm, rest = asyncio.run(parse())
+        self.assertEqual(rpm.filename(), 'Eterm-0.9.3-5mdv2007.0.i586.rpm')
+        self.assertEqual(rpm.header_offset, 440)
+        # the Eterm fixture ends in the middle of the main header, only
+        # accepted without strict
+        self.assertEqual(rest, b'')
+
+    def test_truncated_strict(self):
+        async def parse():
+            return await RPM.from_stream(make_reader(rpm_file), strict=True)
+
+        self.assertRaises(RPMError, asyncio.run, parse())
+
+    def test_misplaced_header(self):
+        async def parse():
+            data = rpm_file[:440] + b'\x00' * 8 + rpm_file[440:]
+            return await RPM.from_stream(make_reader(data))
+
+        self.assertRaises(RPMError, asyncio.run, parse())
+
+    def test_parse_many(self):
+        running = [0, 0]
+
+        async def open_reader():
+            running[0] += 1
+            running[1] = max(running)
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+            return make_reader(rpm_file)
+
+        async def parse():
+            sources = [open_reader] * 10 + [make_reader(b'junk')]
+            return await parse_many(sources, limit=3)
+
+        results = asyncio.run(parse())
+        self.assertEqual([rpm.name() for rpm in results[:10]],
+                         ['Eterm'] * 10)
+        self.assertTrue(isinstance(results[10], RPMError))
+        self.assertEqual(running[1], 3)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+metadata cache tests
+
+'''
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from array import array
+
+from pyrpm import rpmdefs, scan
+from pyrpm.cache import MetadataCache, file_identity
+
+from test_rpm import make_package, rpm_file, strings
+
+
+class MetadataCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.db = os.path.join(self.path, 'cache.sqlite')
+        self.packages = []
+        for name in ('a.rpm', 'b.rpm', 'c.rpm'):
+            path = os.path.join(self.path, name)
+            with open(path, 'wb') as rpmfile:
+                rpmfile.write(rpm_file)
+            self.packages.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_hit_miss(self):
+        with MetadataCache(self.db) as cache:
+            values = cache.get(self.packages[0])
+            self.assertEqual(values[rpmdefs.RPMTAG_NAME], 'Eterm')
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            self.assertEqual(cache.get(self.packages[0]), values)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # persisted across connections, changed files are misses
+        with MetadataCache(self.db) as cache:
+            self.assertEqual(len(cache), 1)
+            cache.get(self.packages[0])
+            self.assertEqual(cache.hits, 1)
+            with open(self.packages[0], 'ab') as rpmfile:
+                rpmfile.write(b'\x00')
+            self.assertEqual(cache.lookup(self.packages[0]), None)
+
+    def test_hit_without_parsing(self):
+        with MetadataCache(self.db) as cache:
+            cache.get(self.packages[0])
+            stat = os.stat(self.packages[0])
+            with open(self.packages[0], 'r+b') as rpmfile:
+                rpmfile.write(b'garbage!')
+            os.utime(self.packages[0], ns=(stat.st_atime_ns,
+                                           stat.st_mtime_ns))
+            self.assertEqual(cache.get(self.packages[0])[rpmdefs.RPMTAG_NAME],
+                             'Eterm')
+
+    def test_values(self):
+        values = {rpmdefs.RPMTAG_NAME: 'a',
+                  rpmdefs.RPMTAG_BASENAMES: ['a', 'b'],
+                  rpmdefs.RPMTAG_FILEMODES: array('H', [0o100644]),
+                  rpmdefs.RPMTAG_SOURCEPKGID: b'\x00\xff'}
+        identity = file_identity(self.packages[0])
+        with MetadataCache(self.db) as cache:
+            cache.store(self.packages[0], identity, values)
+            cached = cache.lookup(self.packages[0], identity)
+            self.assertEqual(cached, values)
+            self.assertEqual(cached[rpmdefs.RPMTAG_FILEMODES].typecode, 'H')
+            # stored data is never unpickled
+            cache.db.execute("UPDATE packages SET tags = ?",
+                             (pickle.dumps(values), ))
+            self.assertEqual(cache.lookup(self.packages[0], identity), None)
+
+    def test_tags_version(self):
+        with MetadataCache(self.db) as cache:
+            cache.get(self.packages[0])
+        tags = rpmdefs.RPMTAGS + (rpmdefs.RPMTAG_SUMMARY, )
+        with MetadataCache(self.db, tags=tags) as cache:
+            self.assertEqual(len(cache), 0)
+            values = cache.get(self.packages[0])
+            self.assertTrue(rpmdefs.RPMTAG_SUMMARY in values)
+
+    def test_eviction(self):
+        with MetadataCache(self.db, max_entries=2) as cache:
+            cache.get(self.packages[0])
+            cache.get(self.packages[1])
+            cache.get(self.packages[0])
+            cache.get(self.packages[2])
+            self.assertEqual(len(cache), 3)
+            cache.flush()
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.lookup(self.packages[1]), None)
+            self.assertNotEqual(cache.lookup(self.packages[0]), None)
+            self.assertNotEqual(cache.lookup(self.packages[2]), None)
+
+    def test_flush(self):
+        with MetadataCache(self.db, flush_interval=2) as cache:
+            cache.get(self.packages[0])
+            cache.get(self.packages[0])
+            cache.get(self.packages[1])
+        with MetadataCache(self.db) as cache:
+            self.assertEqual(len(cache), 2)
+            self.assertEqual(cache.clock, 3)
+
+    def test_scan(self):
+        with MetadataCache(self.db) as cache:
+            first = list(scan([self.path], workers=2, cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (0, 3))
+            second = list(scan([self.path], workers=2, cache=cache))
+            self.assertEqual((cache.hits, cache.misses), (3, 3))
+            self.assertEqual(first, second)
+            self.assertEqual(first[0], {'path': self.packages[0],
+                                        'name': 'Eterm', 'version': '0.9.3',
+                                        'release': '5mdv2007.0',
+                                        'arch': 'i586'})
+            self.assertRaises(ValueError, scan, [self.path],
+                              fields=('summary', ), cache=cache)
+            # source packages are told apart by SOURCERPM
+            self.assertRaises(ValueError, scan, [self.path],
+                              fields=('filename', ), cache=cache)
+
+    def test_scan_filename(self):
+        sourcerpm = (rpmdefs.RPMTAG_SOURCERPM, rpmdefs.RPM_DATA_TYPE_STRING,
+                     1, strings('a-1.0-1.src.rpm'))
+        for name, data in (('a.rpm', make_package('a', entries=[sourcerpm])),
+                           ('a.src.rpm', make_package('a', source=True))):
+            with open(os.path.join(self.path, name), 'wb') as rpmfile:
+                rpmfile.write(data)
+        packages = [os.path.join(self.path, name)
+                    for name in ('a.rpm', 'a.src.rpm')]
+        tags = rpmdefs.RPMTAGS + (rpmdefs.RPMTAG_SOURCERPM, )
+        with MetadataCache(self.db, tags=tags) as cache:
+            for _ in range(2):
+                records = list(scan(packages, fields=('filename', ),
+                                    workers=1, cache=cache))
+                self.assertEqual([record['filename'] for record in records],
+                                 ['a-1.0-1.x86_64.rpm',
+                                  'a-1.0-1.x86_64.src.rpm'])
+            self.assertEqual(cache.hits, 2)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+package catalog tests
+
+'''
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from io import BytesIO
+
+from pyrpm import RPM, rpmdefs
+from pyrpm.catalog import Catalog, PackageRecord
+
+from test_rpm import make_package, strings
+
+# license and group are shared by the test packages
+ENTRIES = [
+    (rpmdefs.RPMTAG_LICENSE, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+     strings('GPL')),
+    (rpmdefs.RPMTAG_GROUP, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE, 1,
+     strings('System/Base')),
+]
+
+
+class CatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = Catalog()
+        for name, version, arch in (('bash', '4.2', 'x86_64'),
+                                    ('bash', '4.2', 'i686'),
+                                    ('bash', '5.0', 'x86_64'),
+                                    ('zlib', '1.2', 'noarch')):
+            data = make_package(name, version, arch=arch, entries=ENTRIES)
+            self.catalog.add('%s-%s.%s' % (name, version, arch),
+                             RPM(BytesIO(data)))
+
+    def test_record(self):
+        record = self.catalog['bash-4.2.x86_64']
+        self.assertEqual(record.nevra(), 'bash-0:4.2-1.x86_64')
+        self.assertEqual((record.license, record.group),
+                         ('GPL', 'System/Base'))
+        self.assertFalse(hasattr(record, '__dict__'))
+        # shared strings are one object
+        self.assertIs(record.license,
+                      self.catalog['zlib-1.2.noarch'].license)
+
+    def test_source(self):
+        data = make_package('bash', entries=[
+            (rpmdefs.RPMTAG_EPOCH, rpmdefs.RPM_DATA_TYPE_INT32, 1,
+             struct.pack('!I', 1))], source=True)
+        record = PackageRecord.from_rpm('bash.src', RPM(BytesIO(data)))
+        self.assertEqual((record.arch, record.epoch, record.vendor),
+                         ('src', 1, None))
+
+    def test_filter(self):
+        keys = lambda records: [record.key for record in records]
+        self.assertEqual(keys(self.catalog.filter(name='bash',
+                                                  arch='x86_64')),
+                         ['bash-4.2.x86_64', 'bash-5.0.x86_64'])
+        self.assertEqual(keys(self.catalog.filter(version='4.2',
+                                                  arch=('i686', 'noarch'))),
+                         ['bash-4.2.i686'])
+        self.assertEqual(self.catalog.filter(name='missing'), [])
+        self.assertEqual(len(self.catalog.filter(release='1')), 4)
+        self.assertEqual(self.catalog.names(), ['bash', 'zlib'])
+
+    def test_replace_remove(self):
+        self.catalog.add('bash-5.0.x86_64',
+                         RPM(BytesIO(make_package('bash', '5.1',
+                                                  entries=ENTRIES))))
+        self.assertEqual(len(self.catalog), 4)
+        self.assertEqual(self.catalog.filter(version='5.0'), [])
+        self.catalog.remove('zlib-1.2.noarch')
+        self.assertEqual(self.catalog.arches(), ['i686', 'x86_64'])
+        self.assertNotIn('zlib-1.2.noarch', self.catalog)
+
+
+class CatalogLoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.paths = []
+        for name in ('a', 'b'):
+            path = os.path.join(self.path, name + '.rpm')
+            with open(path, 'wb') as rpmfile:
+                rpmfile.write(make_package(name, entries=ENTRIES))
+            self.paths.append(path)
+        self.paths.append(os.path.join(self.path, 'missing.rpm'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_load(self):
+        catalog = Catalog.load(self.paths, workers=1)
+        self.assertEqual(catalog.names(), ['a', 'b'])
+        self.assertEqual([path for path, _ in catalog.errors],
+                         self.paths[2:])
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+file list tests
+
+'''
+
+import struct
+import unittest
+from io import BytesIO
+
+from pyrpm import RPM, rpmdefs
+from pyrpm.files import FileList
+from pyrpm.rpm import RPMError
+
+from test_rpm import make_rpm, strings
+
+
+class FileListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rpm = RPM(BytesIO(make_rpm([
+            (rpmdefs.RPMTAG_DIRINDEXES, rpmdefs.RPM_DATA_TYPE_INT32, 4,
+             struct.pack('!4I', 0, 1, 1, 0)),
+            (rpmdefs.RPMTAG_FILESIZES, rpmdefs.RPM_DATA_TYPE_INT32, 4,
+             struct.pack('!4I', 4096, 10, 20, 30)),
+            (rpmdefs.RPMTAG_FILEMODES, rpmdefs.RPM_DATA_TYPE_INT16, 4,
+             struct.pack('!4H', 0o40755, 0o100755, 0o100755, 0o100644)),
+            (rpmdefs.RPMTAG_BASENAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 4,
+             strings('bin', 'x', 'y', 'z')),
+            (rpmdefs.RPMTAG_DIRNAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 2,
+             strings('/usr/', '/usr/bin/')),
+        ])))
+
+    def test_files(self):
+        files = self.rpm.files()
+        self.assertEqual(len(files), 4)
+        self.assertEqual(list(files), ['/usr/bin', '/usr/bin/x',
+                                       '/usr/bin/y', '/usr/z'])
+        self.assertEqual(files[2], '/usr/bin/y')
+        self.assertEqual(list(files.sizes), [4096, 10, 20, 30])
+        self.assertEqual(files.modes[files.index('/usr/z')], 0o100644)
+        self.assertEqual(files.mtimes, None)
+
+    def test_lookup(self):
+        files = self.rpm.files()
+        self.assertTrue('/usr/bin/x' in files)
+        self.assertTrue('/usr/bin' in files)
+        self.assertFalse('/usr/bin/z' in files)
+        self.assertFalse('/etc/x' in files)
+        self.assertEqual(files.find('/usr/bin/y'), 2)
+        self.assertRaises(ValueError, files.index, '/usr/x')
+        # paths are absolute
+        files = FileList.from_paths(['/x'])
+        self.assertEqual(files.find('/x'), 0)
+        self.assertEqual(files.find('x'), None)
+
+    def test_oldfilenames(self):
+        rpm = RPM(BytesIO(make_rpm([
+            (rpmdefs.RPMTAG_OLDFILENAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             3, strings('/etc/a.conf', '/usr/bin/b', '/etc/c.conf')),
+        ])))
+        files = rpm.files()
+        self.assertEqual(files.dirnames, ['/etc/', '/usr/bin/'])
+        self.assertEqual(list(files.dirindexes), [0, 1, 0])
+        self.assertEqual(list(files), ['/etc/a.conf', '/usr/bin/b',
+                                       '/etc/c.conf'])
+        self.assertTrue('/etc/c.conf' in files)
+
+    def test_missing_dirnames(self):
+        rpm = RPM(BytesIO(make_rpm([
+            (rpmdefs.RPMTAG_BASENAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 1,
+             strings('x')),
+        ])))
+        self.assertRaises(RPMError, rpm.files)
+
+    def test_no_files(self):
+        rpm = RPM(BytesIO(make_rpm([])))
+        self.assertEqual(len(rpm.files()), 0)
+        self.assertFalse('/etc/passwd' in rpm.files())
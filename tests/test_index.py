@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+repository dependency index tests
+
+'''
+
+import unittest
+from io import BytesIO
+
+from pyrpm import RPM, rpmdefs
+from pyrpm.index import RepositoryIndex
+
+from test_rpm import make_package
+
+GE = rpmdefs.RPMSENSE_GREATER | rpmdefs.RPMSENSE_EQUAL
+
+
+class RepositoryIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = RepositoryIndex()
+        self.add('bash', provides=('bash', 'sh'),
+                 requires=('libc.so.6', 'rpmlib(PayloadFilesHavePrefix)'),
+                 files=('/bin/bash', '/bin/sh', '/usr/share/doc/bash/README'))
+        self.add('glibc', provides=('libc.so.6', ),
+                 requires=('glibc-common', ))
+        self.add('app', requires=(('/bin/sh', GE, '1.0'), 'libc.so.6',
+                                  'libfoo.so.1'))
+
+    def add(self, name, **dependencies):
+        rpm = RPM(BytesIO(make_package(name, **dependencies)))
+        self.index.add(name, rpm)
+
+    def test_queries(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.what_provides('libc.so.6'),
+                         frozenset(['glibc']))
+        self.assertEqual(self.index.what_provides('/bin/sh'),
+                         frozenset(['bash']))
+        self.assertEqual(self.index.what_provides('app'), frozenset(['app']))
+        self.assertEqual(
+            self.index.what_provides('/usr/share/doc/bash/README'),
+            frozenset())
+        self.assertEqual(self.index.what_requires('libc.so.6'),
+                         frozenset(['bash', 'app']))
+        self.assertEqual(self.index.requires('app')[0],
+                         ('/bin/sh', GE, '1.0'))
+
+    def test_unresolved(self):
+        self.assertEqual(self.index.unresolved(), {
+            'glibc-common': frozenset(['glibc']),
+            'libfoo.so.1': frozenset(['app']),
+        })
+
+    def test_incremental(self):
+        self.add('foo', provides=('libfoo.so.1', ))
+        self.assertEqual(set(self.index.unresolved()), set(['glibc-common']))
+
+        self.index.remove('bash')
+        self.assertEqual(self.index.what_provides('/bin/sh'), frozenset())
+        self.assertEqual(set(self.index.unresolved()),
+                         set(['glibc-common', '/bin/sh']))
+
+        self.index.remove('app')
+        self.assertEqual(set(self.index.unresolved()), set(['glibc-common']))
+        self.assertEqual(self.index.what_requires('libc.so.6'), frozenset())
+        self.assertFalse('app' in self.index)
+
+    def test_frozen(self):
+        keys = self.index.what_requires('libc.so.6')
+        self.assertIsInstance(keys, frozenset)
+        self.assertIs(self.index.what_requires('libc.so.6'), keys)
+        self.add('foo', requires=('libc.so.6', ))
+        self.assertEqual(keys, frozenset(['bash', 'app']))
+        self.assertEqual(self.index.what_requires('libc.so.6'),
+                         frozenset(['bash', 'app', 'foo']))
+
+    def test_replace(self):
+        self.add('app', requires=('sh', ))
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.unresolved(),
+                         {'glibc-common': frozenset(['glibc'])})
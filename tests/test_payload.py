@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+payload reader tests
+
+'''
+
+import bz2
+import gzip
+import lzma
+import tracemalloc
+import unittest
+from io import BytesIO
+
+from pyrpm import RPM, rpmdefs
+from pyrpm.payload import DecompressedStream, Payload
+from pyrpm.rpm import RPMError
+
+from test_rpm import Stream, make_rpm, strings
+
+
+def make_cpio(files):
+    ''' builds a newc cpio archive from (name, mode, data) tuples
+    '''
+    archive = b''
+    for ino, (name, mode, data) in enumerate(
+            list(files) + [('TRAILER!!!', 0, b'')]):
+        name = name.encode('utf-8') + b'\x00'
+        fields = (ino, mode, 0, 0, 1, 1157550008, len(data), 0, 0, 0, 0,
+                  len(name), 0)
+        header = b'070701' + b''.join(b'%08x' % field for field in fields)
+        archive += header + name + b'\x00' * (-(len(header) + len(name)) % 4)
+        archive += data + b'\x00' * (-len(data) % 4)
+    return archive
+
+
+FILES = [
+    ('./etc/eterm.conf', 0o100644, b'font = fixed\n'),
+    ('./usr/bin', 0o40755, b''),
+    ('./usr/bin/Eterm', 0o100755, b'\x7fELF' + b'x' * 100000),
+    ('./usr/share/doc/README', 0o100644, b'read me'),
+]
+
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress(data, compressor):
+    if compressor == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    return {'gzip': gzip.compress, 'bzip2': bz2.compress,
+            'xz': lzma.compress, 'identity': bytes}[compressor](data)
+
+
+class PayloadTest(unittest.TestCase):
+
+    def make_rpm(self, compressor):
+        return make_rpm(
+            [(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+              strings('Eterm')),
+             (rpmdefs.RPMTAG_PAYLOADCOMPRESSOR, rpmdefs.RPM_DATA_TYPE_STRING,
+              1, strings(compressor))],
+            compress(make_cpio(FILES), compressor))
+
+    def test_entries(self):
+        for compressor in ('gzip', 'bzip2', 'xz', 'identity'):
+            rpm = RPM(BytesIO(self.make_rpm(compressor)))
+            entries = [(entry.path, entry.mode, entry.size, entry.read())
+                       for entry in rpm.payload()]
+            self.assertEqual(entries, [(name[1:], mode, len(data), data)
+                                       for name, mode, data in FILES])
+
+    def test_skip_unread(self):
+        rpm = RPM(BytesIO(self.make_rpm('gzip')))
+        entries = list(rpm.payload())
+        self.assertEqual([entry.name for entry in entries],
+                         [name for name, mode, data in FILES])
+        self.assertEqual(entries[2].mtime, 1157550008)
+
+    def test_extract(self):
+        rpm = RPM(Stream(self.make_rpm('xz'), chunk_size=1000))
+        self.assertEqual(rpm.payload().extract(['/usr/share/doc/README',
+                                                '/etc/eterm.conf']),
+                         {'/usr/share/doc/README': b'read me',
+                          '/etc/eterm.conf': b'font = fixed\n'})
+
+    def test_partial_read(self):
+        payload = Payload(BytesIO(gzip.compress(make_cpio(FILES))),
+                          chunk_size=16)
+        for entry in payload:
+            if entry.path == '/usr/bin/Eterm':
+                self.assertEqual(entry.read(4), b'\x7fELF')
+                self.assertEqual(len(entry.read()), 100000)
+                self.assertEqual(entry.read(), b'')
+
+    def test_truncated(self):
+        data = gzip.compress(make_cpio(FILES))[:-100]
+        self.assertRaises(RPMError, list, Payload(BytesIO(data)))
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        rpm = RPM(Stream(self.make_rpm('zstd'), chunk_size=1000))
+        entries = [(entry.path, entry.read()) for entry in rpm.payload()]
+        self.assertEqual(entries, [(name[1:], data)
+                                   for name, mode, data in FILES])
+        data = compress(make_cpio(FILES), 'zstd')[:-100]
+        self.assertRaises(RPMError, list, Payload(BytesIO(data), 'zstd'))
+
+    @unittest.skipIf(zstandard is None, 'zstandard is not installed')
+    def test_zstd_bounded(self):
+        # 64MB of zeros compress to a few KB, reads stay chunk sized
+        data = compress(b'\x00' * (64 << 20), 'zstd')
+        stream = DecompressedStream(BytesIO(data), 'zstd', chunk_size=4096)
+        tracemalloc.start()
+        try:
+            self.assertEqual(len(stream.read(10)), 10)
+            self.assertEqual(stream.skip(64 << 20), (64 << 20) - 10)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 1 << 20)
+
+    def test_unknown_compressor(self):
+        self.assertRaises(RPMError, Payload, BytesIO(b''), 'lz4')
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+remote packages tests, against a local http.server
+
+'''
+
+import re
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyrpm import rpmdefs
+from pyrpm.remote import RemoteReader
+
+from test_rpm import make_rpm, strings
+
+PACKAGES = {
+    '/a.rpm': make_rpm([(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING,
+                         1, strings('a'))], b'x' * 1000000),
+    # a main header larger than the probe
+    '/b.rpm': make_rpm([(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING,
+                         1, strings('b')),
+                        (rpmdefs.RPMTAG_DESCRIPTION,
+                         rpmdefs.RPM_DATA_TYPE_STRING, 1,
+                         strings('b' * 100000))], b'x' * 1000000),
+}
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    ranges = True
+
+    def do_GET(self):
+        data = PACKAGES.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        match = re.match(r'bytes=(\d+)-(\d+)$', self.headers.get('Range', ''))
+        if match and self.ranges:
+            start, end = int(match.group(1)), int(match.group(2)) + 1
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d'
+                             % (start, min(end, len(data)) - 1, len(data)))
+            data = data[start:end]
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class NoRangeHandler(RangeHandler):
+    ranges = False
+
+
+class RemoteReaderTest(unittest.TestCase):
+
+    handler = RangeHandler
+
+    def setUp(self):
+        self.connections = []
+        connections = self.connections
+
+        class Server(ThreadingHTTPServer):
+            def process_request(self, request, client_address):
+                connections.append(client_address)
+                ThreadingHTTPServer.process_request(self, request,
+                                                    client_address)
+
+        self.server = Server(('127.0.0.1', 0), self.handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d' % (self.server.server_address[1], )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_open(self):
+        with RemoteReader(probe_size=4096) as remote:
+            self.assertEqual(remote.open(self.url + '/a.rpm').name(), 'a')
+            self.assertEqual(remote.requests, 1)
+            rpm = remote.open(self.url + '/b.rpm')
+            self.assertEqual(rpm.name(), 'b')
+            self.assertEqual(len(rpm[rpmdefs.RPMTAG_DESCRIPTION]), 100000)
+            self.assertEqual(remote.requests, 3)
+            self.assertTrue(remote.bytes_received < 110000)
+        # kept alive
+        self.assertEqual(len(self.connections), 1)
+
+    def test_missing(self):
+        with RemoteReader() as remote:
+            self.assertRaises(IOError, remote.open, self.url + '/c.rpm')
+            self.assertEqual(remote.open(self.url + '/a.rpm').name(), 'a')
+
+
+class NoRangeTest(RemoteReaderTest):
+
+    handler = NoRangeHandler
+
+    def test_open(self):
+        with RemoteReader(probe_size=4096) as remote:
+            self.assertEqual(remote.open(self.url + '/b.rpm').name(), 'b')
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+repodata generator tests
+
+'''
+
+import bz2
+import gzip
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from pyrpm import rpmdefs
+from pyrpm.repodata import RepodataBuilder, split_evr
+
+from test_rpm import make_package, strings
+
+NS = {'common': 'http://linux.duke.edu/metadata/common',
+      'rpm': 'http://linux.duke.edu/metadata/rpm',
+      'filelists': 'http://linux.duke.edu/metadata/filelists',
+      'other': 'http://linux.duke.edu/metadata/other',
+      'repo': 'http://linux.duke.edu/metadata/repo'}
+
+
+# the tags of the test packages, besides their name and version
+PACKAGE = {
+    'requires': (('/bin/sh', rpmdefs.RPMSENSE_PREREQ, ''),
+                 ('libc.so.6', rpmdefs.RPMSENSE_GREATER |
+                  rpmdefs.RPMSENSE_EQUAL, '1:2.17-3'),
+                 ('rpmlib(CompressedFileNames)', rpmdefs.RPMSENSE_LESS |
+                  rpmdefs.RPMSENSE_EQUAL | rpmdefs.RPMSENSE_RPMLIB,
+                  '3.0.4-1')),
+    'files': ('/usr/bin/tool', '/usr/share/doc/README'),
+    'entries': [
+        (rpmdefs.RPMTAG_SUMMARY, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE, 1,
+         strings('a <tool> & more')),
+        (rpmdefs.RPMTAG_BUILDTIME, rpmdefs.RPM_DATA_TYPE_INT32, 1,
+         struct.pack('!I', 1000)),
+        (rpmdefs.RPMTAG_CHANGELOGTIME, rpmdefs.RPM_DATA_TYPE_INT32, 1,
+         struct.pack('!I', 900)),
+        (rpmdefs.RPMTAG_CHANGELOGNAME, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 1,
+         strings('packager <packager@example.com>')),
+        (rpmdefs.RPMTAG_CHANGELOGTEXT, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 1,
+         strings('- initial package')),
+    ],
+    'payload': b'payload',
+}
+
+
+class SplitEVRTest(unittest.TestCase):
+
+    def test_split_evr(self):
+        self.assertEqual(split_evr('1:2.17-3'), ('1', '2.17', '3'))
+        self.assertEqual(split_evr('2.17'), ('0', '2.17', None))
+
+
+class RepodataBuilderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.state = os.path.join(self.path, 'state.sqlite')
+        self.repository = os.path.join(self.path, 'repository')
+        os.makedirs(os.path.join(self.repository, 'Packages'))
+        for name in ('tool', 'other'):
+            self.write(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write(self, name, version='1.0', data=None):
+        path = os.path.join(self.repository, 'Packages', name + '.rpm')
+        with open(path, 'wb') as rpmfile:
+            rpmfile.write(data or make_package(name, version, **PACKAGE))
+        return path
+
+    def update(self, **kwargs):
+        with RepodataBuilder(self.repository, state=self.state, workers=1,
+                             **kwargs) as builder:
+            return builder.update()
+
+    def location(self, kind, outputdir='repodata'):
+        ''' the path of the kind metadata file listed in repomd.xml
+        '''
+        repomd = ElementTree.parse(os.path.join(
+            self.repository, outputdir, 'repomd.xml')).getroot()
+        for item in repomd.findall('repo:data', NS):
+            if item.get('type') == kind:
+                href = item.find('repo:location', NS).get('href')
+                return os.path.join(self.repository, href)
+
+    def metadata(self, name):
+        with gzip.open(self.location(name)) as metadata:
+            return ElementTree.parse(metadata).getroot()
+
+    def test_primary(self):
+        stats = self.update()
+        self.assertEqual((stats['added'], stats['errors']), (2, []))
+        primary = self.metadata('primary')
+        self.assertEqual(primary.get('packages'), '2')
+        packages = primary.findall('common:package', NS)
+        self.assertEqual([package.find('common:name', NS).text
+                          for package in packages], ['other', 'tool'])
+        package = packages[1]
+        self.assertEqual(package.find('common:summary', NS).text,
+                         'a <tool> & more')
+        self.assertEqual(package.find('common:location', NS).get('href'),
+                         'Packages/tool.rpm')
+        self.assertEqual(package.find('common:version', NS).attrib,
+                         {'epoch': '0', 'ver': '1.0', 'rel': '1'})
+        requires = package.findall('common:format/rpm:requires/rpm:entry',
+                                   NS)
+        self.assertEqual([entry.attrib for entry in requires], [
+            {'name': '/bin/sh', 'pre': '1'},
+            {'name': 'libc.so.6', 'flags': 'GE', 'epoch': '1',
+             'ver': '2.17', 'rel': '3'}])
+        files = package.findall('common:format/common:file', NS)
+        self.assertEqual([path.text for path in files], ['/usr/bin/tool'])
+
+    def test_filelists_other(self):
+        self.update()
+        filelists = self.metadata('filelists')
+        package = filelists.find('filelists:package', NS)
+        self.assertEqual([path.text for path in
+                          package.findall('filelists:file', NS)],
+                         ['/usr/bin/tool', '/usr/share/doc/README'])
+        other = self.metadata('other')
+        changelog = other.find('other:package/other:changelog', NS)
+        self.assertEqual(changelog.attrib,
+                         {'author': 'packager <packager@example.com>',
+                          'date': '900'})
+        self.assertEqual(changelog.text, '- initial package')
+
+    def test_repomd(self):
+        self.update()
+        path = os.path.join(self.repository, 'repodata', 'repomd.xml')
+        repomd = ElementTree.parse(path).getroot()
+        data = repomd.findall('repo:data', NS)
+        self.assertEqual([item.get('type') for item in data],
+                         ['primary', 'filelists', 'other'])
+        for item in data:
+            href = item.find('repo:location', NS).get('href')
+            size = os.path.getsize(os.path.join(self.repository, href))
+            self.assertEqual(item.find('repo:size', NS).text, '%d' % size)
+
+    def test_incremental(self):
+        self.update()
+        self.assertEqual(self.update()['unchanged'], 2)
+        self.write('tool', '2.0',
+                   make_package('tool', '2.0', **PACKAGE) + b'\x00')
+        os.remove(os.path.join(self.repository, 'Packages', 'other.rpm'))
+        self.write('new')
+        stats = self.update()
+        self.assertEqual((stats['added'], stats['updated'], stats['removed'],
+                          stats['unchanged']), (1, 1, 1, 0))
+        versions = [(package.find('common:name', NS).text,
+                     package.find('common:version', NS).get('ver'))
+                    for package in self.metadata('primary')]
+        self.assertEqual(versions, [('new', '1.0'), ('tool', '2.0')])
+
+    def test_errors(self):
+        self.write('broken', data=b'not a package')
+        stats = self.update()
+        self.assertEqual(stats['added'], 2)
+        self.assertEqual([os.path.basename(path)
+                          for path, _ in stats['errors']], ['broken.rpm'])
+        self.assertEqual(self.metadata('primary').get('packages'), '2')
+
+    def test_unreadable(self):
+        self.update()
+        self.write('tool', data=b'not a package any more')
+        stats = self.update()
+        self.assertEqual((stats['removed'], len(stats['errors'])), (1, 1))
+        self.assertEqual(self.metadata('primary').get('packages'), '1')
+
+    def test_files(self):
+        self.update()
+        first = sorted(os.listdir(os.path.join(self.repository, 'repodata')))
+        self.write('new')
+        self.update()
+        files = sorted(os.listdir(os.path.join(self.repository, 'repodata')))
+        self.assertEqual(len(files), 4)
+        self.assertEqual(set(first) & set(files), set(['repomd.xml']))
+        primary = os.path.basename(self.location('primary'))
+        self.assertEqual(primary[64:], '-primary.xml.gz')
+
+    def test_outputdir(self):
+        with RepodataBuilder(self.repository,
+                             os.path.join(self.repository, 'meta', 'repo'),
+                             state=self.state, workers=1) as builder:
+            builder.update()
+        path = self.location('primary', os.path.join('meta', 'repo'))
+        self.assertEqual(os.path.dirname(path),
+                         os.path.join(self.repository, 'meta', 'repo'))
+        self.assertTrue(os.path.exists(path))
+
+    def test_sqlite(self):
+        self.update(sqlite=True)
+        path = os.path.join(self.path, 'primary.sqlite')
+        with bz2.open(self.location('primary_db')) as source:
+            with open(path, 'wb') as target:
+                target.write(source.read())
+        db = sqlite3.connect(path)
+        try:
+            self.assertEqual(db.execute("SELECT name FROM packages "
+                                        "ORDER BY name").fetchall(),
+                             [('other', ), ('tool', )])
+            self.assertEqual(db.execute("SELECT count(*) FROM requires "
+                                        "WHERE pre = 'TRUE'").fetchone(),
+                             (2, ))
+            self.assertEqual(db.execute("SELECT DISTINCT name "
+                                        "FROM files").fetchall(),
+                             [('/usr/bin/tool', )])
+        finally:
+            db.close()
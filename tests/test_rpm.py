@@ -6,10 +6,14 @@ High level pyrpm tests
 
 '''
 
+import os
+import struct
+import tempfile
 import unittest
 from io import BytesIO
 
 from pyrpm import RPM, rpmdefs
+from pyrpm.rpm import Header, RPMError, find_magic_number
 
 rpm_file = b'\xed\xab\xee\xdb\x03\x00\x00\x00\x00\x01Eterm-0.9.3-5mdv2007.0\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x01\x00\x05\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x8e\xad\xe8\x01\x00\x00\x00\x00\x00\x00\x00\x07\x00\x00\x00\xd8\x00\x00\x00>\x00\x00\x00\x07\x00\x00\x00\xc8\x00\x00\x00\x10\x00\x00\x01\x0b\x00\x00\x00\x07\x00\x00\x00\x00\x00\x00\x00A\x00\x00\x01\r\x00\x00\x00\x06\x00\x00\x00A\x00\x00\x00\x01\x00\x00\x03\xe8\x00\x00\x00\x04\x00\x00\x00l\x00\x00\x00\x01\x00\x00\x03\xec\x00\x00\x00\x07\x00\x00\x00p\x00\x00\x00\x10\x00\x00\x03\xed\x00\x00\x00\x07\x00\x00\x00\x80\x00\x00\x00A\x00\x00\x03\xef\x00\x00\x00\x04\x00\x00\x00\xc4\x00\x00\x00\x01\x88?\x03\x05\x00H\xe5N\x17DY5\xf8x\xd0\x19\xf5\x11\x02\xaf \x00\x9ff\xa4\x01cN\x8d\xcc\xcf\xb3\x96`\x92\x83*\xeb\xb9\x94r\x93\xfa\x00\x9e9\xf0r\x92\x95#\xf6\x9e\xcaE\x8eU\xfb\xea\xdc\x0f\xca\xed\xb7\xc92e3cc15e7c0f1a7da51480711bb4d893ab28b7a0\x00\x00\x00\x00\x1fh\xbd\x0b~\x13\xed<~\xe4\xb9ht9\xe8\r\x86\xb2-\x88?\x03\x05\x00H\xe5N\x17DY5\xf8x\xd0\x19\xf5\x11\x02\xc7e\x00\xa0\x80\x8c\x17o\x8a\xc7x\xed#ayBq\xcf\xa8\xab\xfcv\x1d\xad\x00\x9a\x02\xe5\xc3\xf9l\xa48\xfb\xb7\xad\xf2d\x85n\x8fR*Ey\x01\x00\x00\x00\x00$\xcf\xc8\x00\x00\x00>\x00\x00\x00\x07\xff\xff\xff\x90\x00\x00\x00\x10\x8e\xad\xe8\x01\x00\x00\x00\x00\x00\x00\x00?\x00\x00Fl\x00\x00\x00?\x00\x00\x00\x07\x00\x00F\\\x00\x00\x00\x10\x00\x00\x00d\x00\x00\x00\x08\x00\x00\x00\x00\x00\x00\x00\x01\x00\x00\x03\xe8\x00\x00\x00\x06\x00\x00\x00\x02\x00\x00\x00\x01\x00\x00\x03\xe9\x00\x00\x00\x06\x00\x00\x00\x08\x00\x00\x00\x01\x00\x00\x03\xea\x00\x00\x00\x06\x00\x00\x00\x0e\x00\x00\x00\x01\x00\x00\x03\xec\x00\x00\x00\t\x00\x00\x00\x19\x00\x00\x00\x01\x00\x00\x03\xed\x00\x00\x00\t\x00\x00\x00V\x00\x00\x00\x01\x00\x00\x03\xee\x00\x00\x00\x04\x00\x00\x02D\x00\x00\x00\x01\x00\x00\x03\xef\x00\x00\x00\x06\x00\x00\x02H\x00\x00\x00\x01\x00\x00\x03\xf1\x00\x00\x00\x04\x00\x00\x02X\x00\x00\x00\x01\x00\x00\x03\xf2\x00\x00\x00\x06\x00\x00\x02\\\x00\x00\x00\x01\x00\x00\x03\xf3\x00\x00\x00\x06\x00\x00\x02k\x00\x00\x00\x01\x00\x00\x03\xf6\x00\x00\x00\x06\x00\x00\x02t\x00\x00\x00\x01\x00\x00\x03\xf7\x00\x00\x00\x06\x00\x00\x02x\x00\x00\x00\x01\x00\x00\x03\xf8\x00\x00\x00\t\x00\x00\x02\x9b\x00\x00\x00\x01\x00\x00\x03\xfc\x00\x00\x00\x06\x00\x00\x02\xa5\x00\x00\x00\x01\x00\x00\x03\xfd\x00\x00\x00\x06\x00\x00\x02\xc3\x00\x00\x00\x01\x00\x00\x03\xfe\x00\x00\x00\x06\x00\x00\x02\xc9\x00\x00\x00\x01\x00\x00\x04\x00\x00\x00\x00\x06\x00\x00\x02\xce\x00\x00\x00\x01\x00\x00\x04\x02\x00\x00\x00\x06\x00\x00\x04\x04\x00\x00\x00\x01\x00\x00\x04\x04\x00\x00\x00\x04\x00\x00\x04\xa0\x00\x00\x00z\x00\x00\x04\x06\x00\x00\x00\x03\x00\x00\x06\x88\x00\x00\x00z\x00\x00\x04\t\x00\x00\x00\x03\x00\x00\x07|\x00\x00\x00z\x00\x00\x04\n\x00\x00\x00\x04\x00\x00\x08p\x00\x00\x00z\x00\x00\x04\x0b\x00\x00\x00\x08\x00\x00\nX\x00\x00\x00z\x00\x00\x04\x0c\x00\x00\x00\x08\x00\x00\x17\xd2\x00\x00\x00z\x00\x00\x04\r\x00\x00\x00\x04\x00\x00\x18\xd0\x00\x00\x00z\x00\x00\x04\x0f\x00\x00\x00\x08\x00\x00\x1a\xb8\x00\x00\x00z\x00\x00\x04\x10\x00\x00\x00\x08\x00\x00\x1d\x1a\x00\x00\x00z\x00\x00\x04\x14\x00\x00\x00\x06\x00\x00\x1f|\x00\x00\x00\x01\x00\x00\x04\x15\x00\x00\x00\x04\x00\x00\x1f\x9c\x00\x00\x00z\x00\x00\x04\x17\x00\x00\x00\x08\x00\x00!\x84\x00\x00\x00\x01\x00\x00\x04\x18\x00\x00\x00\x04\x00\x00!\x8c\x00\x00\x00\x1d\x00\x00\x04\x19\x00\x00\x00\x08\x00\x00"\x00\x00\x00\x00\x1d\x00\x00\x04\x1a\x00\x00\x00\x08\x00\x00#\x8b\x00\x00\x00\x1d\x00\x00\x04(\x00\x00\x00\x06\x00\x00#\xb4\x00\x00\x00\x01\x00\x00\x048\x00\x00\x00\x04\x00\x00#\xbc\x00\x00\x00\x08\x00\x00\x049\x00\x00\x00\x08\x00\x00#\xdc\x00\x00\x00\x08\x00\x00\x04:\x00\x00\x00\x08\x00\x00%o\x00\x00\x00\x08\x00\x00\x04>\x00\x00\x00\x06\x00\x00(\n\x00\x00\x00\x01\x00\x00\x04@\x00\x00\x00\x06\x00\x00(\x12\x00\x00\x00\x01\x00\x00\x04F\x00\x00\x00\x06\x00\x00(\x1a\x00\x00\x00\x01\x00\x00\x04G\x00\x00\x00\x04\x00\x00(8\x00\x00\x00z\x00\x00\x04H\x00\x00\x00\x04\x00\x00* \x00\x00\x00z\x00\x00\x04I\x00\x00\x00\x08\x00\x00,\x08\x00\x00\x00z\x00\x00\x04X\x00\x00\x00\x04\x00\x00,\x84\x00\x00\x00\x01\x00\x00\x04Y\x00\x00\x00\x08\x00\x00,\x88\x00\x00\x00\x01\x00\x00\x04\\\x00\x00\x00\x04\x00\x00,\x9c\x00\x00\x00z\x00\x00\x04]\x00\x00\x00\x08\x00\x00.\x84\x00\x00\x00z\x00\x00\x04^\x00\x00\x00\x08\x00\x005\x00\x00\x00\x00\x12\x00\x00\x04b\x00\x00\x00\x06\x00\x006\xaf\x00\x00\x00\x01\x00\x00\x04d\x00\x00\x00\x06\x00\x0071\x00\x00\x00\x01\x00\x00\x04e\x00\x00\x00\x06\x00\x0076\x00\x00\x00\x01\x00\x00\x04f\x00\x00\x00\x06\x00\x007;\x00\x00\x00\x01\x00\x00\x04k\x00\x00\x00\x06\x00\x007=\x00\x00\x00\x01\x00\x00\x04l\x00\x00\x00\x06\x00\x007B\x00\x00\x00\x01\x00\x00\x04t\x00\x00\x00\x04\x00\x007\\\x00\x00\x00z\x00\x00\x04u\x00\x00\x00\x04\x00\x009D\x00\x00\x00z\x00\x00\x04v\x00\x00\x00\x08\x00\x00;,\x00\x00\x00\x1b\x00\x00\x04w\x00\x00\x00\x04\x00\x00@\x94\x00\x00\x00z\x00\x00\x04x\x00\x00\x00\x04\x00\x00B|\x00\x00\x00z\x00\x00\x04z\x00\x00\x00\x07\x00\x00Dd\x00\x00\x00\x10\x00\x00\x04\x99\x00\x00\x00\x04\x00\x00Dt\x00\x00\x00zC\x00Eterm\x000.9.3\x005mdv2007.0\x00Eterm (Enlightened Terminal Emulator) is a terminal emulator\x00Eterm is a color vt102 terminal emulator intended as a replacement for Xterm.\nIt is designed with a Freedom of Choice philosophy, leaving as much power,\nflexibility, and freedom as possible in the hands of the user.\n\nIt is designed to look good and work well, but takes a feature-rich approach\nrather than one of minimalism while still maintaining speed and efficiency.\n\nIt works on any windowmanager/desktop environment, although it is designed\nto work and integrate best with Enlightenment.\x00\x00D\xfe\xcf\xb8n5.mandriva.com\x00\x00$\x86tMandriva Linux\x00Mandriva\x00BSD\x00Jerome Soyer <saispo@mandriva.org>\x00Terminals\x00http://eterm.sourceforge.net/\x00linux\x00i586\x00if [ -x /usr/bin/update-menus ]; then /usr/bin/update-menus || true ; fi \n\nupdate-alternatives --install /usr/bin/xvt xvt /usr/bin/Eterm 15\n\nif [ -d /usr/share/terminfo -a ! -f /usr/share/terminfo/E/Eterm ]; then\n    tic -o /usr/share/terminfo /usr/share/doc/Eterm-0.9.3/Eterm.ti\nfi\n\n/usr/bin/Etbg_update_list\x00if [ "$1" = "0" -a -x /usr/bin/update-menus ]; then /usr/bin/update-menus || true ; fi \n\t\n[ "$1" = "0" ]&& update-alternatives --remove xvt /usr/bin/Eterm\x00\x00\x00\x00-\xdc\x00\x00\x0f\xd8\x00\x00\ni\x00\x00\x07u\x00\x00\r|\x00\x00\x02\xc9\x00\x00\x11\xc8\x00\x00\rN\x00\x00\x00\xb8\x00\x00\x10\x00\x00\x00\x10\x00\x00\x00\x02\xd3\x00\x00\x02\xf6\x00\x00\x02\xcc\x00\x00\x032\x00\x00\x03-\x00\x00\x03,\x00\x00\x02\xeb\x00\x00\x02\xd3\x00\x00\x02\xd4\x00\x00\x02\xc5\x00\x00\x02\xb9\x00\x00\x02\xc0\x00\x00\x16\xd5\x00\x00\x0cu\x00\x00\x042\x00\x00\x04J\x00\x00\x04W\x00\x00\x06\x91\x00\x00\x10\x00\x00\x00R\x01\x00\x00~O\x00\x00\x01\xba\x00\x00\x02\x18\x00\x00nm\x00\x00)z\x00\x00\x00\xd2\x00\x00\x00\xd2\x00\x00\x10\x00\x00\x00\xd5U\x00\x00\x04\xf2\x00\x02\x11\x88\x00\x00\xb8/\x00\x00H\xc6\x00\x00H\xe6\x00\x00-N\x00\x006V\x00\x002\x1e\x00\x00\xc5\xa0\x00\x00\x88\x9b\x00\x00"_\x00\x00\x07\x86\x00\x00\n\x95\x00\x00\x01\x04\x00\x00.\xe0\x00\x00q\xb3\x00\x00G\xd7\x00\x00\x80)\x00\x011\xde\x00\x00@\xd1\x00\x00\xdf`\x00\x00\xa2\x87\x00\x009O\x00\x00)\'\x00\x00\xf0\x1c\x00\x00\xdd%\x00\x00{R\x00\x00:6\x00\x00\xe7f\x00\x00X\xbc\x00\x00\xb7\xe1\x00\x00\x0c\x9f\x00\x01\x00k\x00\x01\x9f<\x00\x01\xda\x00\x00\x00\xa3\xd6\x00\x00\xbc\xa4\x00\x00\xc3U\x00\x00]O\x00\x01Ku\x00\x00\xb0\x8c\x00\x00&\x1b\x00\x00-\xbb\x00\x00R\xc3\x00\x01"\x92\x00\x00"\x95\x00\x00\xd8\x04\x00\x00\x10\x00\x00\x00\x10\x00\x00\x00\x006\x00\x00\x00\x16\x00\x00\x0e\xde\x00\x00\x10\x00\x00\x00F\xd5\x00\x00\x00\x16\x00\x00-#\x00\x00\x10\x00\x00\x00F\xd5\x00\x00\x00\x16\x00\x00\x110\x00\x00\x10\x00\x00\x006\xb5\x00\x00\x00\x16\x00\x00.g\x00\x00\x10\x00\x00\x00>~'
 
@@ -44,3 +48,295 @@ class RPMTest(unittest.TestCase):
 
     def test_filename(self):
         self.assertEqual(self.rpm.filename(), 'Eterm-0.9.3-5mdv2007.0.i586.rpm')
+
+    def test_all_tags(self):
+        self.assertEqual(self.rpm[rpmdefs.RPMTAG_SUMMARY],
+                         'Eterm (Enlightened Terminal Emulator) is a '
+                         'terminal emulator')
+        self.assertEqual(self.rpm[rpmdefs.RPMTAG_GROUP], 'Terminals')
+        self.assertEqual(self.rpm[rpmdefs.RPMTAG_VENDOR], 'Mandriva')
+        self.assertTrue(rpmdefs.RPMTAG_BASENAMES in self.rpm)
+        self.assertEqual(len(list(self.rpm)), 63)
+        self.assertEqual(self.rpm[rpmdefs.RPMTAG_EPOCH], None)
+        self.assertEqual(list(self.rpm[rpmdefs.RPMTAG_BUILDTIME]),
+                         [1157550008])
+
+    def test_lazy_decoding(self):
+        rpm = RPM(BytesIO(rpm_file))
+        header = rpm._RPM__headers[0]
+        self.assertEqual(header.values, {})
+        self.assertEqual(rpm.name(), 'Eterm')
+        self.assertEqual(list(header.values), [rpmdefs.RPMTAG_NAME])
+
+    def test_header_offsets(self):
+        self.assertEqual(self.rpm.signature_offset, 96)
+        self.assertEqual(self.rpm.header_offset, 440)
+        # the fixture ends in the middle of the main header data store
+        self.assertRaises(RPMError, RPM, BytesIO(rpm_file), strict=True)
+        data = make_rpm([(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING,
+                          1, b'pyrpm\x00')])
+        self.assertEqual(RPM(BytesIO(data), strict=True).name(), 'pyrpm')
+
+    def test_misplaced_header(self):
+        # 8 bytes of junk between the signature and the main header
+        data = rpm_file[:440] + b'\x00' * 8 + rpm_file[440:]
+        rpm = RPM(BytesIO(data))
+        self.assertEqual(rpm.header_offset, 448)
+        self.assertEqual(rpm.name(), 'Eterm')
+        self.assertRaises(RPMError, RPM, BytesIO(data), strict=True)
+
+    def test_magic_in_signature(self):
+        # the main header is searched for past the signature
+        magic = rpmdefs.RPM_HEADER_MAGIC_NUMBER
+        data = make_rpm([(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING,
+                          1, b'pyrpm\x00')],
+                        signature=[(rpmdefs.RPMSIGTAG_MD5,
+                                    rpmdefs.RPM_DATA_TYPE_BIN, 16,
+                                    magic + b'\x01' + b'\x00' * 12)])
+        data = data[:144] + b'\x00' * 8 + data[144:]
+        rpm = RPM(BytesIO(data))
+        self.assertEqual(rpm.header_offset, 152)
+        self.assertEqual(rpm.name(), 'pyrpm')
+
+
+class FindMagicNumberTest(unittest.TestCase):
+
+    def test_chunk_boundary(self):
+        data = BytesIO(b'x' * 10 + rpmdefs.RPM_HEADER_MAGIC_NUMBER + b'y')
+        magic = rpmdefs.RPM_HEADER_MAGIC_NUMBER
+        self.assertEqual(find_magic_number(data, magic, chunk_size=4), 10)
+        data.seek(11)
+        self.assertEqual(find_magic_number(data, magic, chunk_size=4), None)
+
+
+class RPMOpenTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.rpm')
+        with os.fdopen(fd, 'wb') as rpmfile:
+            rpmfile.write(rpm_file)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_open(self):
+        with RPM.open(self.path) as rpm:
+            self.assertEqual(rpm.filename(), 'Eterm-0.9.3-5mdv2007.0.i586.rpm')
+            self.assertEqual(rpm.header_offset, 440)
+        # decoded values outlive the mapping
+        self.assertEqual(rpm.name(), 'Eterm')
+        self.assertRaises(RPMError, rpm.__getitem__, rpmdefs.RPMTAG_SUMMARY)
+
+    def test_open_empty(self):
+        with open(self.path, 'wb'):
+            pass
+        self.assertRaises(RPMError, RPM.open, self.path)
+
+    def test_open_truncated(self):
+        with open(self.path, 'wb') as rpmfile:
+            rpmfile.write(rpm_file[:500])
+        self.assertRaises(RPMError, RPM.open, self.path)
+        # the fixture data store is truncated
+        with open(self.path, 'wb') as rpmfile:
+            rpmfile.write(rpm_file)
+        self.assertRaises(RPMError, RPM.open, self.path, strict=True)
+
+
+def make_index(entries):
+    ''' builds the index records and the data store from
+    (tag, type, count, data) tuples
+    '''
+    index = b''
+    store = b''
+    for tag, type, count, data in entries:
+        index += struct.pack('!llll', tag, type, len(store), count)
+        store += data
+    return index, store
+
+
+def make_header(entries):
+    ''' builds a Header from (tag, type, count, data) tuples
+    '''
+    return Header(None, *make_index(entries))
+
+
+def make_header_bytes(entries):
+    ''' builds a header structure, as found in a file, holding entries
+    '''
+    index, store = make_index(entries)
+    header = struct.pack('!3sc4sll', rpmdefs.RPM_HEADER_MAGIC_NUMBER, b'\x01',
+                         b'\x00' * 4, len(entries), len(store))
+    return header + index + store
+
+
+def make_rpm(entries, payload=b'', signature=None, source=False):
+    ''' builds a RPM file with the Eterm lead, the Eterm signature header
+    or one holding the signature entries, a main header holding entries
+    and the payload
+    '''
+    if signature is None:
+        lead = rpm_file[:440]
+    else:
+        lead = rpm_file[:96] + make_header_bytes(signature)
+        lead += b'\x00' * (-len(lead) % 8)
+    if source:
+        lead = lead[:6] + struct.pack('!h', 1) + lead[8:]
+    return lead + make_header_bytes(entries) + payload
+
+
+def strings(*values):
+    return b''.join(value.encode('utf-8') + b'\x00' for value in values)
+
+
+def make_package(name, version='1.0', release='1', arch='x86_64',
+                 provides=(), requires=(), files=(), entries=(),
+                 payload=b'', source=False):
+    ''' builds a RPM file of a package, see make_rpm
+
+        provides, requires - names or (name, flags, version) tuples
+        files - full paths
+        entries - more (tag, type, count, data) tuples
+    '''
+    header = [
+        (rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+         strings(name)),
+        (rpmdefs.RPMTAG_VERSION, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+         strings(version)),
+        (rpmdefs.RPMTAG_RELEASE, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+         strings(release)),
+        (rpmdefs.RPMTAG_ARCH, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+         strings(arch)),
+    ]
+    for tags, dependencies in (
+            ((rpmdefs.RPMTAG_PROVIDENAME, rpmdefs.RPMTAG_PROVIDEFLAGS,
+              rpmdefs.RPMTAG_PROVIDEVERSION), provides),
+            ((rpmdefs.RPMTAG_REQUIRENAME, rpmdefs.RPMTAG_REQUIREFLAGS,
+              rpmdefs.RPMTAG_REQUIREVERSION), requires)):
+        if not dependencies:
+            continue
+        names, flags, versions = zip(*[
+            (dependency, rpmdefs.RPMSENSE_ANY, '')
+            if isinstance(dependency, str) else dependency
+            for dependency in dependencies])
+        header += [
+            (tags[0], rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, len(names),
+             strings(*names)),
+            (tags[1], rpmdefs.RPM_DATA_TYPE_INT32, len(flags),
+             struct.pack('!%dI' % len(flags), *flags)),
+            (tags[2], rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, len(versions),
+             strings(*versions)),
+        ]
+    if files:
+        header.append((rpmdefs.RPMTAG_OLDFILENAMES,
+                       rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, len(files),
+                       strings(*files)))
+    return make_rpm(header + list(entries), payload, source=source)
+
+
+class Stream(object):
+    ''' non seekable stream returning short reads, like a pipe
+    '''
+    def __init__(self, data, chunk_size=7):
+        self.data = BytesIO(data)
+        self.chunk_size = chunk_size
+
+    def read(self, size=-1):
+        if size < 0:
+            return self.data.read()
+        return self.data.read(min(size, self.chunk_size))
+
+
+class StreamTest(unittest.TestCase):
+
+    def test_stream(self):
+        data = make_rpm([(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING,
+                          1, b'pyrpm\x00')], b'payload')
+        stream = Stream(data)
+        rpm = RPM(stream, strict=True)
+        self.assertEqual(rpm.name(), 'pyrpm')
+        self.assertEqual(rpm.payload_offset, len(data) - len(b'payload'))
+        self.assertEqual(stream.read(), b'payload')
+
+    def test_stream_misplaced_header(self):
+        data = rpm_file[:440] + b'\x00' * 8 + rpm_file[440:]
+        self.assertRaises(RPMError, RPM, Stream(data))
+
+    def test_header_too_large(self):
+        data = rpm_file[:104] + b'\xff\xff\xff\xff' + rpm_file[108:]
+        self.assertRaises(RPMError, RPM, Stream(data))
+
+
+class HeaderTest(unittest.TestCase):
+
+    def test_int_arrays(self):
+        header = make_header([
+            (rpmdefs.RPMTAG_FILEMODES, rpmdefs.RPM_DATA_TYPE_INT16, 3,
+             struct.pack('!3H', 0o100644, 0o40755, 0o120777)),
+            (rpmdefs.RPMTAG_FILESIZES, rpmdefs.RPM_DATA_TYPE_INT32, 2,
+             struct.pack('!2I', 3000000000, 12)),
+            (rpmdefs.RPMTAG_FILEFLAGS, rpmdefs.RPM_DATA_TYPE_INT8, 2,
+             b'\x01\xff'),
+            (rpmdefs.RPMTAG_LONGFILESIZES, rpmdefs.RPM_DATA_TYPE_INT64, 1,
+             struct.pack('!Q', 2 ** 40)),
+        ])
+        self.assertEqual(list(header[rpmdefs.RPMTAG_FILEMODES]),
+                         [0o100644, 0o40755, 0o120777])
+        self.assertEqual(list(header[rpmdefs.RPMTAG_FILESIZES]),
+                         [3000000000, 12])
+        self.assertEqual(list(header[rpmdefs.RPMTAG_FILEFLAGS]), [1, 255])
+        self.assertEqual(list(header[rpmdefs.RPMTAG_LONGFILESIZES]), [2 ** 40])
+
+    def test_strings(self):
+        header = make_header([
+            (rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+             b'pyrpm\x00'),
+            (rpmdefs.RPMTAG_BASENAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 3,
+             b'a\x00\x00c\x00'),
+            (rpmdefs.RPMTAG_SUMMARY, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE, 2,
+             b'summary\x00resumo\x00'),
+            (rpmdefs.RPMTAG_SOURCEPKGID, rpmdefs.RPM_DATA_TYPE_BIN, 4,
+             b'\x00\x01\x02\x03'),
+        ])
+        self.assertEqual(header[rpmdefs.RPMTAG_NAME], 'pyrpm')
+        self.assertEqual(header[rpmdefs.RPMTAG_BASENAMES], ['a', '', 'c'])
+        self.assertEqual(header[rpmdefs.RPMTAG_SUMMARY], 'summary')
+        self.assertEqual(header[rpmdefs.RPMTAG_SOURCEPKGID],
+                         b'\x00\x01\x02\x03')
+
+    def test_truncated(self):
+        header = make_header([
+            (rpmdefs.RPMTAG_DIRNAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 2,
+             b'/usr\x00'),
+            (rpmdefs.RPMTAG_FILESIZES, rpmdefs.RPM_DATA_TYPE_INT32, 2,
+             b'\x00\x00\x00\x01'),
+        ])
+        self.assertRaises(RPMError, header.__getitem__,
+                          rpmdefs.RPMTAG_FILESIZES)
+        self.assertRaises(RPMError, header.__getitem__,
+                          rpmdefs.RPMTAG_DIRNAMES)
+
+    def test_string_count(self):
+        header = make_header([
+            (rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, 0,
+             b'pyrpm\x00'),
+            (rpmdefs.RPMTAG_BASENAMES, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, -1,
+             b'a\x00'),
+        ])
+        self.assertRaises(RPMError, header.__getitem__, rpmdefs.RPMTAG_NAME)
+        self.assertRaises(RPMError, header.__getitem__,
+                          rpmdefs.RPMTAG_BASENAMES)
+
+    def test_latin1_strings(self):
+        header = make_header([
+            (rpmdefs.RPMTAG_PACKAGER, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+             'Jérôme'.encode('latin-1') + b'\x00'),
+            (rpmdefs.RPMTAG_CHANGELOGTEXT, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+             2, 'café'.encode('utf-8') + b'\x00' +
+             'café'.encode('latin-1') + b'\x00'),
+            (rpmdefs.RPMTAG_SUMMARY, rpmdefs.RPM_DATA_TYPE_I18NSTRING_TYPE, 1,
+             'résumé'.encode('latin-1') + b'\x00'),
+        ])
+        self.assertEqual(header[rpmdefs.RPMTAG_PACKAGER], 'Jérôme')
+        self.assertEqual(header[rpmdefs.RPMTAG_CHANGELOGTEXT],
+                         ['café', 'café'])
+        self.assertEqual(header[rpmdefs.RPMTAG_SUMMARY], 'résumé')
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+bulk scanner tests
+
+'''
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from io import StringIO
+from unittest import mock
+
+from pyrpm import scan
+from pyrpm.scanner import main, write_csv
+
+from test_rpm import rpm_file
+
+
+class ScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.path, 'sub'))
+        self.packages = []
+        for name in ('a.rpm', 'b.rpm', os.path.join('sub', 'c.rpm')):
+            path = os.path.join(self.path, name)
+            with open(path, 'wb') as rpmfile:
+                rpmfile.write(rpm_file)
+            self.packages.append(path)
+        self.broken = os.path.join(self.path, 'broken.rpm')
+        with open(self.broken, 'wb') as rpmfile:
+            rpmfile.write(b'not a rpm')
+        with open(os.path.join(self.path, 'README'), 'w') as readme:
+            readme.write('ignored')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_scan(self):
+        records = list(scan([self.path], workers=2, chunksize=1))
+        self.assertEqual([record['path'] for record in records],
+                         sorted(self.packages + [self.broken]))
+        for record in records:
+            if record['path'] == self.broken:
+                self.assertTrue('error' in record)
+            else:
+                self.assertEqual(record['name'], 'Eterm')
+                self.assertEqual(record['arch'], 'i586')
+
+    def test_scan_unordered(self):
+        records = scan(self.packages, fields=('filename', 'buildtime'),
+                       workers=2, ordered=False)
+        records = sorted(records, key=lambda record: record['path'])
+        self.assertEqual(records[0], {
+            'path': self.packages[0],
+            'filename': 'Eterm-0.9.3-5mdv2007.0.i586.rpm',
+            'buildtime': [1157550008],
+        })
+        self.assertEqual(len(records), 3)
+
+    def test_unknown_field(self):
+        self.assertRaises(ValueError, scan, [self.path], fields=('nope', ))
+        self.assertRaises(ValueError, scan, [self.path],
+                          fields=('min_number', ))
+
+    def test_csv(self):
+        output = StringIO()
+        errors = write_csv(scan([self.path], workers=1), output,
+                           ('name', 'version'))
+        self.assertEqual(errors, 1)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(lines[0], 'path,name,version,error')
+        self.assertEqual(lines[1], '%s,Eterm,0.9.3,' % (self.packages[0], ))
+
+    def test_main(self):
+        with mock.patch('sys.stdout', new_callable=StringIO) as output:
+            status = main(['-j', '1', '-f', 'name,release', self.packages[0]])
+        self.assertEqual(status, 0)
+        self.assertEqual(json.loads(output.getvalue()), {
+            'path': self.packages[0], 'name': 'Eterm',
+            'release': '5mdv2007.0'})
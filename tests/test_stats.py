@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+parse instrumentation tests
+
+'''
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from io import BytesIO
+
+from pyrpm import RPM, rpmdefs, scan
+from pyrpm.aio import parse_many
+from pyrpm.stats import STAGES, ParseStats
+from pyrpm.writer import synthetic_package
+
+from test_rpm import Stream, rpm_file
+
+
+class ParseStatsTest(unittest.TestCase):
+
+    def test_disabled(self):
+        rpm = RPM(BytesIO(rpm_file))
+        self.assertIsNone(rpm.stats)
+
+    def test_package(self):
+        packages = []
+        stats = ParseStats(hook=packages.append)
+        rpm = RPM(Stream(synthetic_package()), stats=stats)
+        self.assertEqual(packages, [rpm.stats])
+        self.assertEqual(rpm.stats.bytes_read, rpm.payload_offset)
+        self.assertGreater(rpm.stats.read_calls, 5)
+        self.assertEqual(rpm.stats.tags, len(rpm.signature) + len(list(rpm)))
+        self.assertEqual(rpm.stats.searches, 0)
+        self.assertEqual(rpm.stats.tags_decoded, 0)
+        self.assertGreater(rpm.stats.times['header'], 0)
+
+        rpm.name()
+        rpm.name()
+        self.assertEqual(rpm.stats.tags_decoded, 1)
+        self.assertEqual(stats.tags_decoded, 1)
+        self.assertEqual(stats.as_dict()['bytes_read'], rpm.payload_offset)
+
+    def test_search(self):
+        data = rpm_file[:440] + b'\x00' * 8 + rpm_file[440:]
+        stats = ParseStats()
+        rpm = RPM(BytesIO(data), stats=stats)
+        self.assertEqual(rpm.header_offset, 448)
+        self.assertEqual(stats.searches, 1)
+        self.assertGreater(stats.times['search'], 0)
+
+    def test_aggregate(self):
+        stats = ParseStats()
+        for _ in range(3):
+            RPM(BytesIO(rpm_file), stats=stats)[rpmdefs.RPMTAG_VERSION]
+        self.assertEqual((stats.packages, stats.tags_decoded), (3, 3))
+        report = stats.report()
+        self.assertEqual(report['mean']['tags_decoded'], 1)
+        self.assertAlmostEqual(report['total_time'],
+                               sum(stats.times.values()))
+        text = stats.format_report()
+        for stage in STAGES:
+            self.assertIn(stage, text)
+
+    def test_stream(self):
+        async def parse():
+            readers = []
+            for _ in range(2):
+                reader = asyncio.StreamReader()
+                reader.feed_data(synthetic_package())
+                reader.feed_eof()
+                readers.append(reader)
+            return await parse_many(readers, stats=stats)
+
+        stats = ParseStats()
+        rpms = asyncio.run(parse())
+        self.assertEqual(stats.packages, 2)
+        self.assertEqual(stats.bytes_read, 2 * rpms[0].payload_offset)
+
+
+class ScanStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        for name in ('a.rpm', 'b.rpm'):
+            with open(os.path.join(self.path, name), 'wb') as rpmfile:
+                rpmfile.write(rpm_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_scan(self):
+        stats = ParseStats()
+        records = list(scan([self.path], workers=1, stats=stats))
+        self.assertEqual([sorted(record) for record in records],
+                         [['arch', 'name', 'path', 'release', 'version']] * 2)
+        self.assertEqual((stats.packages, stats.tags_decoded), (2, 8))
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+package verification tests
+
+'''
+
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from io import BytesIO
+
+from pyrpm import rpmdefs
+from pyrpm.verify import verify, verify_file, verify_many
+
+from test_rpm import make_header_bytes, make_rpm, rpm_file, strings
+
+ENTRIES = [(rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+            strings('Eterm'))]
+PAYLOAD = b'payload' * 100000
+
+
+def make_signed_rpm(entries=ENTRIES, payload=PAYLOAD):
+    payload_digest = hashlib.sha256(payload).hexdigest()
+    entries = entries + [
+        (rpmdefs.RPMTAG_PAYLOADDIGEST, rpmdefs.RPM_DATA_TYPE_STRING_ARRAY, 1,
+         strings(payload_digest)),
+        (rpmdefs.RPMTAG_PAYLOADDIGESTALGO, rpmdefs.RPM_DATA_TYPE_INT32, 1,
+         struct.pack('!I', rpmdefs.PGPHASHALGO_SHA256)),
+    ]
+    header = make_header_bytes(entries)
+    signature = [
+        (rpmdefs.RPMSIGTAG_SHA1, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+         strings(hashlib.sha1(header).hexdigest())),
+        (rpmdefs.RPMSIGTAG_SHA256, rpmdefs.RPM_DATA_TYPE_STRING, 1,
+         strings(hashlib.sha256(header).hexdigest())),
+        (rpmdefs.RPMSIGTAG_SIZE, rpmdefs.RPM_DATA_TYPE_INT32, 1,
+         struct.pack('!I', len(header + payload))),
+        (rpmdefs.RPMSIGTAG_MD5, rpmdefs.RPM_DATA_TYPE_BIN, 16,
+         hashlib.md5(header + payload).digest()),
+    ]
+    return make_rpm(entries, payload, signature)
+
+
+class VerifyTest(unittest.TestCase):
+
+    def test_valid(self):
+        self.assertEqual(verify_file(BytesIO(make_signed_rpm()),
+                                     chunk_size=4096),
+                         {'size': True, 'md5': True, 'sha1': True,
+                          'sha256': True, 'payloaddigest': True})
+
+    def test_corrupted_payload(self):
+        data = bytearray(make_signed_rpm())
+        data[-10] ^= 1
+        self.assertEqual(verify_file(BytesIO(bytes(data))),
+                         {'size': True, 'md5': False, 'sha1': True,
+                          'sha256': True, 'payloaddigest': False})
+
+    def test_corrupted_header(self):
+        data = make_signed_rpm().replace(b'Eterm', b'Xterm')
+        results = verify_file(BytesIO(data))
+        self.assertEqual((results['sha1'], results['sha256'], results['md5']),
+                         (False, False, False))
+        self.assertEqual(results['payloaddigest'], True)
+
+    def test_truncated(self):
+        # the Eterm fixture stops in the middle of the main header
+        self.assertEqual(verify_file(BytesIO(rpm_file)),
+                         {'size': False, 'md5': False, 'sha1': False})
+
+    def test_verify_many(self):
+        path = tempfile.mkdtemp()
+        try:
+            good = os.path.join(path, 'good.rpm')
+            with open(good, 'wb') as rpmfile:
+                rpmfile.write(make_signed_rpm())
+            bad = os.path.join(path, 'bad.rpm')
+            with open(bad, 'wb') as rpmfile:
+                rpmfile.write(b'junk')
+            self.assertTrue(all(verify(good).values()))
+            results = list(verify_many([good, bad, good], workers=2))
+            self.assertEqual([result[0] for result in results],
+                             [good, bad, good])
+            self.assertTrue(all(results[0][1].values()))
+            self.assertEqual(results[1][1], None)
+            self.assertTrue(results[1][2])
+        finally:
+            shutil.rmtree(path)
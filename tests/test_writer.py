@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# -*- Mode: Python; py-ident-offset: 4 -*-
+# vim:ts=4:sw=4:et
+'''
+rpm writer and benchmark tests
+
+'''
+
+import unittest
+from io import BytesIO, StringIO
+
+from pyrpm import RPM, rpmdefs
+from pyrpm.benchmark import STAGES, report, run
+from pyrpm.verify import verify_file
+from pyrpm.writer import build_rpm, encode, synthetic_package
+
+
+class WriterTest(unittest.TestCase):
+
+    def test_encode(self):
+        self.assertEqual(encode(rpmdefs.RPM_DATA_TYPE_INT16, [1, 2]),
+                         (2, b'\x00\x01\x00\x02'))
+        self.assertEqual(encode(rpmdefs.RPM_DATA_TYPE_STRING_ARRAY,
+                                ['a', 'bc']), (2, b'a\x00bc\x00'))
+        self.assertRaises(ValueError, encode, rpmdefs.RPM_DATA_TYPE_STRING,
+                          ['a', 'b'])
+
+    def test_round_trip(self):
+        data = build_rpm([
+            (rpmdefs.RPMTAG_NAME, rpmdefs.RPM_DATA_TYPE_STRING, 'pyrpm'),
+            # ints following the 6 bytes name are realigned
+            (rpmdefs.RPMTAG_FILESIZES, rpmdefs.RPM_DATA_TYPE_INT32,
+             [1, 2, 3]),
+            (rpmdefs.RPMTAG_FILEMODES, rpmdefs.RPM_DATA_TYPE_INT16,
+             [0o100644] * 3),
+        ], b'payload', source=True)
+        rpm = RPM(BytesIO(data), strict=True)
+        self.assertEqual(rpm.name(), 'pyrpm')
+        self.assertTrue(rpm.source)
+        self.assertEqual(list(rpm[rpmdefs.RPMTAG_FILESIZES]), [1, 2, 3])
+        self.assertEqual(list(rpm[rpmdefs.RPMTAG_FILEMODES]), [0o100644] * 3)
+        self.assertEqual(data[rpm.payload_offset:], b'payload')
+        self.assertEqual(len(rpm.signature[rpmdefs.RPMSIGTAG_MD5]), 16)
+        self.assertEqual(verify_file(BytesIO(data)),
+                         {'size': True, 'md5': True})
+
+    def test_synthetic_package(self):
+        data = synthetic_package(files=25, payload_size=1000, changelogs=3)
+        self.assertEqual(data, synthetic_package(files=25, payload_size=1000,
+                                                 changelogs=3))
+        self.assertNotEqual(data, synthetic_package(files=25, seed=1))
+        rpm = RPM(BytesIO(data), strict=True)
+        self.assertEqual(rpm.filename(), 'synthetic-1.0-1.x86_64.rpm')
+        self.assertEqual(len(rpm.files()), 25)
+        self.assertEqual(len(rpm[rpmdefs.RPMTAG_CHANGELOGTEXT]), 3)
+        self.assertEqual(len(data) - rpm.payload_offset, 1000)
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_run(self):
+        results = run(['minimal', 'typical'], count=2, repeat=1)
+        self.assertEqual(sorted(results['shapes']), ['minimal', 'typical'])
+        typical = results['shapes']['typical']
+        self.assertEqual(sorted(typical['stages']), sorted(STAGES))
+        self.assertGreater(typical['packages_per_second'], 0)
+        self.assertGreater(typical['peak_memory'], 0)
+        output = StringIO()
+        report(results, baseline=results, output=output)
+        self.assertIn('1.00x', output.getvalue())